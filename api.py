@@ -1,26 +1,42 @@
 # -*- coding: utf-8 -*-`
-"""api.py - Create and configure the Hangman API, contains the game logic ."""
+"""api.py - Create and configure the Hangman API, the game logic is in
+engine.py."""
+
+import logging
+import random
+import time
 
 import endpoints
 from protorpc import remote, messages
-from google.appengine.api import memcache
-from google.appengine.api import taskqueue
+from google.appengine.api import datastore_errors
+from google.appengine.ext import ndb
 
 from models import User, Game, Score
 from models import StringMessage, NewGameForm, GameForm, MakeMoveForm,\
-    ScoreForms, GamesForm, GameHistoryForm, LeaderBoardForm
-from utils import get_by_urlsafe
+    ScoreForms, GamesForm, GameHistoryForm, LeaderBoardForm, MakeMovesForm,\
+    MoveResultForm, MovesForm
+from utils import get_by_urlsafe, get_references
+from engine import HangmanEngine, IllegalMoveError
 
 NEW_GAME_REQUEST = endpoints.ResourceContainer(NewGameForm)
 GET_GAME_REQUEST = endpoints.ResourceContainer(
     urlsafe_game_key=messages.StringField(1),)
+GET_HISTORY_REQUEST = endpoints.ResourceContainer(
+    urlsafe_game_key=messages.StringField(1),
+    page_size=messages.IntegerField(2),
+    cursor=messages.StringField(3),)
 MAKE_MOVE_REQUEST = endpoints.ResourceContainer(
     MakeMoveForm, urlsafe_game_key=messages.StringField(1),)
+MAKE_MOVES_REQUEST = endpoints.ResourceContainer(
+    MakeMovesForm, urlsafe_game_key=messages.StringField(1),)
 USER_REQUEST = endpoints.ResourceContainer(user_name=messages.StringField(1),
                                            email=messages.StringField(2))
 GET_HIGH_SCORES = endpoints.ResourceContainer(number_of_results=messages.IntegerField(1))
 
-MEMCACHE_MOVES_REMAINING = 'MOVES_REMAINING'
+# retries of a game update conflicting with a concurrent one, the first
+# retry waits about MOVE_BACKOFF seconds and every retry doubles it
+MOVE_RETRIES = 5
+MOVE_BACKOFF = 0.05
 
 @endpoints.api(name='hangman', version='v1')
 class HangmanApi(remote.Service):
@@ -32,11 +48,11 @@ class HangmanApi(remote.Service):
                       http_method='POST')
     def create_user(self, request):
         """Create a User. Requires a unique username"""
-        if User.query(User.name == request.user_name).get():
+        if not request.user_name or request.user_name.startswith('__'):
+            raise endpoints.BadRequestException('Invalid user name!')
+        if not User.create(request.user_name, request.email):
             raise endpoints.ConflictException(
                     'A User with that name already exists!')
-        user = User(name=request.user_name, email=request.email)
-        user.put()
         return StringMessage(message='User {} created!'.format(
                 request.user_name))
 
@@ -47,20 +63,15 @@ class HangmanApi(remote.Service):
                       http_method='POST')
     def new_game(self, request):
         """Creates new game"""
-        user = User.query(User.name == request.user_name).get()
+        user = User.get_by_name(request.user_name)
         if not user:
             raise endpoints.NotFoundException(
                     'A User with that name does not exist!')
         try:
-            game = Game.new_game(user.key, request.length, request.attempts)
+            game = Game.new_game(user, request.length, request.attempts)
         except ValueError:
             raise endpoints.BadRequestException('Attempts must be between 3 and'
                                                '10 and length between 5 and 10')
-
-        # Use a task queue to update the average attempts remaining.
-        # This operation is not needed to complete the creation of a new game
-        # so it is performed out of sequence.
-        taskqueue.add(url='/tasks/cache_average_attempts')
         return game.to_form('Good luck playing Hangman!')
 
     @endpoints.method(request_message=GET_GAME_REQUEST,
@@ -83,79 +94,34 @@ class HangmanApi(remote.Service):
                       http_method='PUT')
     def make_move(self, request):
         """Makes a move. Returns a game state with message"""
-        game = get_by_urlsafe(request.urlsafe_game_key, Game)
-        # manage game_over and cancelled games
-        if game.game_over:
-            raise endpoints.ForbiddenException('Illegal action: Game is already over.')
-        if game.cancelled:
-            raise endpoints.ForbiddenException('Illegal action: Game already cancelled!.')
-
-        # guess to lowercase
-        guess = request.guess.lower()
-
-        # manage ilegal movements
-        if guess in game.status_fails:
-            raise endpoints.ForbiddenException('Illegal action: Already failed.')
-        if not guess.isalpha():
-            msg = 'Illegal action: Guess must only contain letters and at least one letter'
-            raise endpoints.ForbiddenException(msg)
-        if (len(guess) != 1) and (len(guess) != len(game.target)):
-            msg = 'Illegal action: Guess must contain one or {} letters.'.format(len(game.target))
-            raise endpoints.ForbiddenException(msg)
-        if game.status_word.find(guess) > 0:
-            raise endpoints.ForbiddenException('Illegal action: Already played.')
+        game, results, error = self._apply_with_retries(
+                self._apply_moves, request.urlsafe_game_key, [request.guess],
+                request.version)
+        if error:
+            raise endpoints.ForbiddenException(error)
+        return game.to_form(results[0].message)
 
-        # MAKE MOVE
-        end = False
-        # manage guess word attempt:
-        if len(guess) > 1 and (guess == game.target):
-            game.status_word = game.target
-            end = True
-            success = True
-            msg = 'You win!, word is: -{0}-.'.format(game.status_word)
-        # if char is in target word:
-        elif game.target.find(guess) > -1:
-            success = True
-            newStatus = game.status_word
-            # find all occurrences of guess in target word
-            indexes = [i for i, c in enumerate(game.target) if c == guess]
-            # calculate new status_word
-            # iterate result word (can be '*****') and replace required indexes
-            for i in indexes:
-                # each iteration replace the index in word with guessed letters
-                newStatus = newStatus[:i] + newStatus[i:].replace('*', guess, 1)
-            game.status_word = newStatus
-            # check if user has won
-            if newStatus.find('*') < 0:
-                end = True
-                success = True
-                msg = 'You win!, word is: -{0}-.'.format(game.status_word)
-            # otherwise return status_word
-            else:
-                msg = 'Good, -{0}- is in word: -{1}-.'.format(guess, game.status_word)
-        # unless char found in word, or guess is target word
-        else:
-            success = False
-            game.status_fails.append(request.guess)
-            game.attempts_remaining -= 1
-            msg = 'Oh, oh, you failed.'
-            # manage game over
-            if game.attempts_remaining < 1:
-                end = True
-                msg = msg + ' GAME OVER! word was: {0}'.format(game.target)
-        # insert move
-        move = {'guess': guess,
-                'success': success,
-                'attempts_remaining': game.attempts_remaining,
-                'result_status': game.status_word,
-                'result_fails': game.status_fails}
-        game.moves.append(move)
-        # return result
-        if end:
-            game.end_game(success)
-            return game.to_form(msg)
-        game.put()
-        return game.to_form(msg)
+    @endpoints.method(request_message=MAKE_MOVES_REQUEST,
+                      response_message=MovesForm,
+                      path='game/{urlsafe_game_key}/moves',
+                      name='make_moves',
+                      http_method='PUT')
+    def make_moves(self, request):
+        """Makes several moves in order with a single write of the game.
+        Stops at the first illegal move or when the game ends. Returns the
+        result of every move made and the final game state"""
+        game, results, error = self._apply_with_retries(
+                self._apply_moves, request.urlsafe_game_key, request.guesses,
+                request.version)
+        items = [MoveResultForm(guess=result.guess, success=result.success,
+                                message=result.message, illegal=False)
+                 for result in results]
+        if error:
+            items.append(MoveResultForm(
+                    guess=request.guesses[len(results)], success=False,
+                    message=error, illegal=True))
+        message = items[-1].message if items else None
+        return MovesForm(results=items, game=game.to_form(message))
 
     @endpoints.method(response_message=ScoreForms,
                       path='scores',
@@ -163,7 +129,7 @@ class HangmanApi(remote.Service):
                       http_method='GET')
     def get_scores(self, request):
         """Return all scores"""
-        return ScoreForms(items=[score.to_form() for score in Score.query()])
+        return ScoreForms(items=self._score_forms(Score.query()))
 
     @endpoints.method(request_message=USER_REQUEST,
                       response_message=ScoreForms,
@@ -172,20 +138,24 @@ class HangmanApi(remote.Service):
                       http_method='GET')
     def get_user_scores(self, request):
         """Returns all of an individual User's scores"""
-        user = User.query(User.name == request.user_name).get()
+        user = User.get_by_name(request.user_name)
         if not user:
             raise endpoints.NotFoundException(
                     'A User with that name does not exist!')
         scores = Score.query(Score.user == user.key)
-        return ScoreForms(items=[score.to_form() for score in scores])
+        return ScoreForms(items=self._score_forms(scores))
 
     @endpoints.method(response_message=StringMessage,
                       path='games/average_attempts',
                       name='get_average_attempts_remaining',
                       http_method='GET')
     def get_average_attempts(self, request):
-        """Get the cached average moves remaining"""
-        return StringMessage(message=memcache.get(MEMCACHE_MOVES_REMAINING) or '')
+        """Get the average moves remaining of the games in progress"""
+        average = Game.average_attempts()
+        if average is None:
+            return StringMessage(message='')
+        return StringMessage(message='The average moves remaining is '
+                             '{:.2f}'.format(average))
 
 ### NEW API ENDPOINTS ###
     @endpoints.method(request_message=USER_REQUEST,
@@ -195,14 +165,14 @@ class HangmanApi(remote.Service):
                       http_method='GET')
     def get_user_games(self, request):
         """ This returns all of a User's active games. """
-        user = User.query(User.name == request.user_name).get()
+        user = User.get_by_name(request.user_name)
         if not user:
             raise endpoints.NotFoundException(
                     'A User with that name does not exist!')
         games = Game.query(Game.user == user.key,
                            Game.game_over == False,
                            Game.cancelled == False)
-        return GamesForm(items=[game.to_form() for game in games])
+        return GamesForm(items=self._game_forms(games))
 
     @endpoints.method(request_message=GET_GAME_REQUEST,
                       response_message=GameForm,
@@ -211,15 +181,8 @@ class HangmanApi(remote.Service):
                       http_method='PUT')
     def cancel_game(self, request):
         """ Cancel a game in progress. """
-        game = get_by_urlsafe(request.urlsafe_game_key, Game)
-        if game.game_over:
-            msg = 'Game already over!'
-        elif game.cancelled:
-            msg = 'Game already cancelled!'
-        else:
-            msg = 'Game cancelled!'
-            game.cancelled = True
-            game.put()
+        game, msg = self._apply_with_retries(self._apply_cancel,
+                                             request.urlsafe_game_key)
         return game.to_form(msg)
 
     @endpoints.method(request_message=GET_HIGH_SCORES,
@@ -230,7 +193,7 @@ class HangmanApi(remote.Service):
     def get_high_scores(self, request):
         """ Generates a lists of high scores in descending order. """
         scores = Score.query().order(Score.errors, -Score.length).fetch(request.number_of_results)
-        return ScoreForms(items=[score.to_form() for score in scores])
+        return ScoreForms(items=self._score_forms(scores))
 
     @endpoints.method(response_message=LeaderBoardForm,
                       path='scores/rankings',
@@ -241,30 +204,156 @@ class HangmanApi(remote.Service):
         users = User.query().order(-User.score)
         return LeaderBoardForm(items=[user.to_rank_form() for user in users])
 
-    @endpoints.method(request_message=GET_GAME_REQUEST,
+    @endpoints.method(request_message=GET_HISTORY_REQUEST,
                       response_message=GameHistoryForm,
                       path='game/{urlsafe_game_key}/history',
                       name='get_game_history',
                       http_method='GET')
     def get_game_history(self, request):
-        """ This returns the history of the game """
+        """ This returns the history of the game, a page of page_size moves
+        starting at cursor if page_size is given """
         game = get_by_urlsafe(request.urlsafe_game_key, Game)
+        if not game:
+            raise endpoints.NotFoundException('Game not found!')
+        next_cursor = None
+        if request.page_size is not None:
+            try:
+                moves, next_cursor = game.history_page(
+                    request.page_size, request.cursor)
+            except ValueError:
+                raise endpoints.BadRequestException(
+                    'Page size must be positive and cursor returned by a '
+                    'previous page!')
+        else:
+            moves = game.history()
         return GameHistoryForm(urlsafe_game_key=request.urlsafe_game_key,
                                game_cancelled=game.cancelled,
                                game_over=game.game_over,
-                               moves=game.moves)
+                               moves=moves,
+                               next_cursor=next_cursor)
 
     @staticmethod
-    def _cache_average_attempts():
-        """Populates memcache with the average moves remaining of Games"""
-        games = Game.query(Game.game_over == False).fetch()
-        if games:
-            count = len(games)
-            total_attempts_remaining = sum([game.attempts_remaining
-                                        for game in games])
-            average = float(total_attempts_remaining)/count
-            memcache.set(MEMCACHE_MOVES_REMAINING,
-                         'The average moves remaining is {:.2f}'.format(average))
+    def _score_forms(scores):
+        """Returns the ScoreForm of the scores, the users of the scores
+        without a user name are fetched in one batch"""
+        scores = list(scores)
+        users = get_references([score for score in scores
+                                if not score.user_name], 'user')
+        return [score.to_form(users.get(score.user)) for score in scores]
 
+    @staticmethod
+    def _game_forms(games):
+        """Returns the GameForm of the games, the users of the games without
+        a user name are fetched in one batch"""
+        games = list(games)
+        users = get_references([game for game in games
+                                if not game.user_name], 'user')
+        return [game.to_form(user=users.get(game.user)) for game in games]
+
+    @staticmethod
+    def _apply_with_retries(apply, *args):
+        """Runs a transactional update of a game, retrying it with
+        exponential backoff when it conflicts with a concurrent update"""
+        for retry in range(MOVE_RETRIES + 1):
+            try:
+                result = apply(*args)
+            except datastore_errors.TransactionFailedError:
+                if retry == MOVE_RETRIES:
+                    logging.warning('%s gave up after %d retries',
+                                    apply.__name__, retry)
+                    raise endpoints.ConflictException(
+                            'The game is being updated, try again.')
+                time.sleep(MOVE_BACKOFF * 2 ** retry *
+                           random.uniform(0.5, 1.5))
+            else:
+                if retry:
+                    logging.info('%s committed after %d retries',
+                                 apply.__name__, retry)
+                return result
+
+    @staticmethod
+    @ndb.transactional(xg=True, retries=0)
+    def _apply_moves(urlsafe_game_key, guesses, version=None):
+        """Applies the guesses in order to the game in a transaction, with a
+        single batched write of the game and its moves, together with the
+        Score and User updates when they end it. Stops at the first illegal
+        guess or at the end of the game. Returns the game, the list of
+        MoveResult of the applied guesses and the message of the illegal
+        guess (or None)."""
+        game = get_by_urlsafe(urlsafe_game_key, Game)
+        if not game:
+            raise endpoints.NotFoundException('Game not found!')
+        if version is not None and version != game.version:
+            raise endpoints.ConflictException(
+                    'The game has changed, get it again before moving.')
+        attempts_before = game.attempts_remaining
+        engine = HangmanEngine(game.target, game.status_word,
+                               game.status_fails, game.attempts_remaining,
+                               game.game_over, game.cancelled)
+        results = []
+        new_moves = []
+        error = None
+        for guess in guesses:
+            try:
+                result = engine.guess(guess)
+            except IllegalMoveError as e:
+                error = str(e)
+                break
+            results.append(result)
+            # insert move
+            move = game.add_move(guess, result.success, engine)
+            if move:
+                new_moves.append(move)
+            if result.end:
+                # the game ends: its user is fetched while the game is
+                # updated and the Score built, see Game.end_game
+                user_future = game.user.get_async()
+                break
+        if not results:
+            return game, results, error
+        game.status_word = engine.status_word
+        game.status_fails = engine.status_fails
+        game.attempts_remaining = engine.attempts_remaining
+        game.version += 1
+        # the game leaves the games in progress, or loses its misses
+        if results[-1].end:
+            Game.track_active(-1, -attempts_before)
+            # Game, Score, User and Moves in one batch
+            game.end_game(results[-1].success, user_future, new_moves)
+        else:
+            misses = attempts_before - engine.attempts_remaining
+            if misses:
+                Game.track_active(0, -misses)
+            ndb.put_multi([game] + new_moves)
+        return game, results, error
+
+    @staticmethod
+    @ndb.transactional(retries=0)
+    def _apply_cancel(urlsafe_game_key):
+        """Cancels the game in a transaction. Returns the game and the
+        message."""
+        game = get_by_urlsafe(urlsafe_game_key, Game)
+        if not game:
+            raise endpoints.NotFoundException('Game not found!')
+        if game.game_over:
+            msg = 'Game already over!'
+        elif game.cancelled:
+            msg = 'Game already cancelled!'
+        else:
+            msg = 'Game cancelled!'
+            game.cancelled = True
+            game.version += 1
+            Game.track_active(-1, -game.attempts_remaining)
+            game.put()
+        return game, msg
+
+    @staticmethod
+    def _reconcile_average_attempts():
+        """Corrects the drift of the counters of the games in progress"""
+        count_drift, attempts_drift = Game.reconcile_active()
+        if count_drift or attempts_drift:
+            logging.warning('Corrected the games in progress by %d and their '
+                            'attempts remaining by %d', count_drift,
+                            attempts_drift)
 
 api = endpoints.api_server([HangmanApi])
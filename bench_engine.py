@@ -0,0 +1,156 @@
+"""bench_engine.py - Benchmark and fuzz of the Hangman move engine, without
+the Datastore. The fuzzer plays random guesses (letters, words, uppercase and
+invalid ones) on both the engine and the original make_move logic and checks
+they return the same messages and state.
+
+    python bench_engine.py --games 10000
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+
+from engine import HangmanEngine, IllegalMoveError
+
+WORDS = ['apple', 'banana', 'kitchen', 'elephant', 'chocolate', 'basketball',
+         'letter', 'mississippi', 'aardvark', 'zzzzz']
+
+
+def legacy_move(state, raw_guess):
+    """The original make_move logic of api.py, on a dict of the game state.
+    Returns (success, end, message), raises IllegalMoveError."""
+    if state['game_over']:
+        raise IllegalMoveError('Illegal action: Game is already over.')
+    guess = raw_guess.lower()
+    if guess in state['status_fails']:
+        raise IllegalMoveError('Illegal action: Already failed.')
+    if not guess.isalpha():
+        raise IllegalMoveError('Illegal action: Guess must only contain '
+                               'letters and at least one letter')
+    if (len(guess) != 1) and (len(guess) != len(state['target'])):
+        raise IllegalMoveError('Illegal action: Guess must contain one or {} '
+                               'letters.'.format(len(state['target'])))
+    if state['status_word'].find(guess) > 0:
+        raise IllegalMoveError('Illegal action: Already played.')
+    end = False
+    if len(guess) > 1 and (guess == state['target']):
+        state['status_word'] = state['target']
+        end = success = True
+        msg = 'You win!, word is: -{0}-.'.format(state['status_word'])
+    elif state['target'].find(guess) > -1:
+        success = True
+        new_status = state['status_word']
+        indexes = [i for i, c in enumerate(state['target']) if c == guess]
+        for i in indexes:
+            new_status = new_status[:i] + new_status[i:].replace('*', guess, 1)
+        state['status_word'] = new_status
+        if new_status.find('*') < 0:
+            end = True
+            msg = 'You win!, word is: -{0}-.'.format(state['status_word'])
+        else:
+            msg = 'Good, -{0}- is in word: -{1}-.'.format(
+                guess, state['status_word'])
+    else:
+        success = False
+        state['status_fails'].append(raw_guess)
+        state['attempts_remaining'] -= 1
+        msg = 'Oh, oh, you failed.'
+        if state['attempts_remaining'] < 1:
+            end = True
+            msg = msg + ' GAME OVER! word was: {0}'.format(state['target'])
+    state['game_over'] = end
+    return success, end, msg
+
+
+def random_guess(target):
+    """Returns a random guess, mostly letters"""
+    draw = random.random()
+    if draw < 0.6:
+        return random.choice(target + string.ascii_lowercase)
+    if draw < 0.75:
+        return random.choice(target).upper()
+    if draw < 0.85:
+        return random.choice([target, target[::-1], target.upper()])
+    return random.choice(['', '1', 'ab', '-', 'a1', ' '])
+
+
+def replays_first_letter(state, guess):
+    """The original logic corrupts status_word when the first letter of the
+    word is played again, the engine keeps it unchanged"""
+    guess = guess.lower()
+    return len(guess) == 1 and state['status_word'].find(guess) == 0
+
+
+def fuzz(games):
+    """Plays random games on both implementations, returns the mismatches"""
+    mismatches = 0
+    for _ in range(games):
+        target = random.choice(WORDS)
+        attempts = random.randint(3, 10)
+        state = {'target': target, 'status_word': '*' * len(target),
+                 'status_fails': [], 'attempts_remaining': attempts,
+                 'game_over': False}
+        engine = HangmanEngine(target, '*' * len(target), [], attempts)
+        for _ in range(40):
+            guess = random_guess(target)
+            if replays_first_letter(state, guess):
+                continue
+            try:
+                expected = legacy_move(state, guess)
+            except IllegalMoveError as e:
+                expected = str(e)
+            try:
+                result = engine.guess(guess)
+                got = (result.success, result.end, result.message)
+            except IllegalMoveError as e:
+                got = str(e)
+            if got != expected or \
+                    engine.status_word != state['status_word'] or \
+                    engine.status_fails != state['status_fails'] or \
+                    engine.attempts_remaining != state['attempts_remaining']:
+                mismatches += 1
+                print 'MISMATCH {} {!r}: {} != {}'.format(target, guess, got,
+                                                          expected)
+                break
+            # the engine is rebuilt from the stored state, like make_move
+            engine = HangmanEngine(target, engine.status_word,
+                                   engine.status_fails,
+                                   engine.attempts_remaining,
+                                   engine.game_over)
+    return mismatches
+
+
+def bench(games):
+    """Returns the seconds to play the given number of random games"""
+    guesses = [[random_guess(random.choice(WORDS)) for _ in range(15)]
+               for _ in range(games)]
+    start = time.time()
+    for game_guesses in guesses:
+        target = random.choice(WORDS)
+        engine = HangmanEngine(target, '*' * len(target), [], 10)
+        for guess in game_guesses:
+            try:
+                engine.guess(guess)
+            except IllegalMoveError:
+                pass
+    return time.time() - start
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Bench and fuzz the engine.')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    mismatches = fuzz(args.games)
+    print 'fuzz: {} games, {} mismatches'.format(args.games, mismatches)
+    seconds = bench(args.games)
+    print 'bench: {} games in {:.3f}s'.format(args.games, seconds)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""bench_startup.py - Measures the cold start cost of the app: the time to
+import the api and main modules in a fresh interpreter, and whether the
+wordnik package got loaded on the way (it must only be loaded when a game is
+created). Exits with an error when a module is slower than --max-seconds or
+loads wordnik, so regressions can be caught in CI.
+
+    python bench_startup.py --sdk /path/to/google_appengine --runs 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULES = ['api', 'main']
+RUNS = 5
+
+# run in a fresh interpreter for every measure, nothing is cached
+PROBE = '''
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+sdk = {sdk!r}
+if sdk:
+    sys.path.insert(0, sdk)
+    import dev_appserver
+    dev_appserver.fix_sys_path()
+os.chdir({root!r})
+import appengine_config
+start = time.time()
+import {module}
+print json.dumps({{'seconds': time.time() - start,
+                  'wordnik_loaded': 'wordnik' in sys.modules}})
+'''
+
+
+def measure(module, sdk=None):
+    """Returns (seconds, wordnik_loaded) of importing module once"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    code = PROBE.format(root=root, sdk=sdk, module=module)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['seconds'], result['wordnik_loaded']
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark app imports.')
+    parser.add_argument('--sdk', help='App Engine SDK path')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--max-seconds', type=float,
+                        help='fail if the median import time is higher')
+    args = parser.parse_args()
+    failed = False
+    for module in MODULES:
+        results = [measure(module, args.sdk) for _ in range(args.runs)]
+        times = sorted(seconds for seconds, _ in results)
+        median = times[len(times) // 2]
+        wordnik_loaded = any(loaded for _, loaded in results)
+        print '{:<6} median {:.3f}s min {:.3f}s max {:.3f}s wordnik {}'.format(
+            module, median, times[0], times[-1],
+            'loaded' if wordnik_loaded else 'not loaded')
+        if wordnik_loaded or \
+                (args.max_seconds is not None and median > args.max_seconds):
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
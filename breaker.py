@@ -0,0 +1,105 @@
+"""breaker.py - Circuit breaker for the calls to an external service (the
+Wordnik API). After too many consecutive failed or slow calls the circuit
+opens and calls fail fast, after a cool-down a single trial call is let
+through (half-open) and closes the circuit again if it succeeds."""
+
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+FAILURE_THRESHOLD = 3
+SLOW_CALL_SECONDS = 2.0
+RESET_TIMEOUT = 30
+
+
+class CircuitOpenError(Exception):
+    """The call was not made because the circuit is open"""
+
+
+class CircuitBreaker(object):
+    """Thread-safe circuit breaker.
+    Args:
+        failure_threshold: consecutive failed or slow calls that open the
+            circuit.
+        slow_call_seconds: calls taking longer than this count as failures
+            even if they succeed.
+        reset_timeout: seconds the circuit stays open before a trial call.
+        clock: function returning the current time in seconds."""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD,
+                 slow_call_seconds=SLOW_CALL_SECONDS,
+                 reset_timeout=RESET_TIMEOUT, clock=time.time):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self.counts = {'calls': 0, 'failures': 0, 'slow_calls': 0,
+                       'rejected': 0, 'opened': 0}
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, **kwargs):
+        """Calls fn(*args, **kwargs) through the breaker.
+        Raises:
+            CircuitOpenError: if the circuit is open."""
+        self._before_call()
+        start = self.clock()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._after_call(failed=True, slow=False)
+            raise
+        slow = self.clock() - start > self.slow_call_seconds
+        self._after_call(failed=False, slow=slow)
+        return result
+
+    def stats(self):
+        """Returns the state of the breaker and its counters"""
+        with self._lock:
+            stats = dict(self.counts)
+            stats['state'] = self.state
+            stats['consecutive_failures'] = self.consecutive_failures
+            stats['opened_at'] = self.opened_at
+            return stats
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN and \
+                    self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == OPEN or \
+                    (self.state == HALF_OPEN and self._trial_running):
+                self.counts['rejected'] += 1
+                raise CircuitOpenError('Circuit is open')
+            if self.state == HALF_OPEN:
+                self._trial_running = True
+            self.counts['calls'] += 1
+
+    def _after_call(self, failed, slow):
+        with self._lock:
+            trial = self.state == HALF_OPEN
+            self._trial_running = False
+            if failed:
+                self.counts['failures'] += 1
+            if slow:
+                self.counts['slow_calls'] += 1
+            if failed or slow:
+                self.consecutive_failures += 1
+                if trial or \
+                        self.consecutive_failures >= self.failure_threshold:
+                    self._open()
+            else:
+                self.consecutive_failures = 0
+                self.state = CLOSED
+
+    def _open(self):
+        if self.state != OPEN:
+            self.counts['opened'] += 1
+        self.state = OPEN
+        self.opened_at = self.clock()
@@ -0,0 +1,101 @@
+"""counters.py - Sharded counters, for values incremented too often to be
+written in a single entity (an entity group takes about one write per
+second). A counter is spread over up to `shards` CounterShard entities, an
+increment writes one of them at random and the value is the sum of the
+shards, cached in memcache. Counter names are 'group:id', the counters of a
+group with a value not taken yet (see take) can be listed."""
+
+import random
+
+from google.appengine.api import memcache
+from google.appengine.ext import ndb
+
+SHARDS = 5
+# cross-group transactions span 25 entity groups at most
+MAX_SHARDS = 12
+CACHE_SECONDS = 60
+NAMESPACE = 'counters'
+
+
+class CounterShard(ndb.Model):
+    """Part of the value of the counter 'name', the key id is name:index"""
+    name = ndb.StringProperty(required=True, indexed=False)
+    group = ndb.StringProperty(required=True)
+    count = ndb.IntegerProperty(required=True, default=0, indexed=False)
+    # incremented since the last take
+    pending = ndb.BooleanProperty(required=True, default=False)
+
+
+def shard_keys(name, shards=SHARDS):
+    """Returns the keys of the shards of a counter"""
+    return [ndb.Key(CounterShard, '{}:{}'.format(name, index))
+            for index in range(min(shards, MAX_SHARDS))]
+
+
+@ndb.tasklet
+def increment_async(name, delta=1, shards=SHARDS):
+    """Adds delta to a random shard of the counter. Call it in a
+    transaction, the cached value is updated when it commits."""
+    key = random.choice(shard_keys(name, shards))
+    shard = yield key.get_async()
+    if shard is None:
+        shard = CounterShard(key=key, name=name, group=name.split(':')[0])
+    shard.count += delta
+    shard.pending = True
+    yield shard.put_async()
+    ndb.get_context().call_on_commit(lambda: _update_cache(name, delta))
+
+
+def _update_cache(name, delta):
+    # a missing value is left missing, get_count will sum the shards
+    if delta >= 0:
+        memcache.incr(name, delta, namespace=NAMESPACE)
+    else:
+        memcache.decr(name, -delta, namespace=NAMESPACE)
+
+
+@ndb.transactional
+def increment(name, delta=1, shards=SHARDS):
+    """Adds delta to the counter, in the current transaction if any"""
+    increment_async(name, delta, shards).get_result()
+
+
+def get_count(name, shards=SHARDS):
+    """Returns the value of the counter, summed from its shards on a cache
+    miss"""
+    count = memcache.get(name, namespace=NAMESPACE)
+    if count is None:
+        count = sum_shards(name, shards)
+        memcache.add(name, count, time=CACHE_SECONDS, namespace=NAMESPACE)
+    return count
+
+
+def sum_shards(name, shards=SHARDS):
+    """Returns the value of the counter read from its shards, uncached"""
+    return sum(shard.count for shard
+               in ndb.get_multi(shard_keys(name, shards)) if shard)
+
+
+def take(name, shards=SHARDS):
+    """Resets the counter to 0 and returns its value. Call it in a
+    cross-group transaction that adds the value to another entity, so the
+    value is moved atomically."""
+    pending = [shard for shard in ndb.get_multi(shard_keys(name, shards))
+               if shard and shard.pending]
+    total = sum(shard.count for shard in pending)
+    for shard in pending:
+        shard.count = 0
+        shard.pending = False
+    ndb.put_multi(pending)
+    ndb.get_context().call_on_commit(
+        lambda: memcache.delete(name, namespace=NAMESPACE))
+    return total
+
+
+def pending_names(group, limit=None):
+    """Returns the names of the counters of group incremented since their
+    last take (the query is eventually consistent)"""
+    keys = CounterShard.query(CounterShard.group == group,
+                              CounterShard.pending == True).fetch(
+                                  limit, keys_only=True)
+    return sorted(set(key.string_id().rsplit(':', 1)[0] for key in keys))
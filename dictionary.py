@@ -0,0 +1,126 @@
+"""dictionary.py - Offline word source. A plain word list is built once into a
+compact binary index with one bucket of fixed-width records per word length,
+so picking a random word of a given length is a single read at a random
+offset. The index is opened with mmap when available, pages are then shared
+between processes and only loaded on demand.
+
+Build the index with:
+    python dictionary.py words.txt dictionary.bin
+"""
+
+import argparse
+import random
+import struct
+
+try:
+    import mmap
+except ImportError:
+    # mmap is not available in every sandbox, fall back to reading the file
+    mmap = None
+
+MAGIC = 'HNGD'
+HEADER = struct.Struct('<4sI')
+BUCKET = struct.Struct('<III')
+# word lengths a game can ask for, the index must have words of each
+GAME_LENGTHS = range(5, 11)
+
+
+class MissingLengthError(LookupError):
+    """The index has no word of the requested length"""
+
+
+def build(words, path, required_lengths=GAME_LENGTHS):
+    """Writes the index for the given words to path and returns the number of
+    words per length. Only alphabetic words are kept (the same rule used for
+    words coming from Wordnik), lowercased and without duplicates.
+    Args:
+        words: iterable of words, one per item.
+        path: destination file of the index.
+        required_lengths: lengths that must have words.
+    Raises:
+        MissingLengthError: if a required length has no word, nothing is
+            written then."""
+    buckets = {}
+    for word in words:
+        word = word.strip().lower()
+        if word and word.isalpha() and all(ord(c) < 128 for c in word):
+            buckets.setdefault(len(word), set()).add(word)
+    missing = [length for length in required_lengths
+               if length not in buckets]
+    if missing:
+        raise MissingLengthError('No words of length {}'.format(
+            ', '.join(str(length) for length in missing)))
+    lengths = sorted(buckets)
+    offset = HEADER.size + BUCKET.size * len(lengths)
+    with open(path, 'wb') as index:
+        index.write(HEADER.pack(MAGIC, len(lengths)))
+        for length in lengths:
+            count = len(buckets[length])
+            index.write(BUCKET.pack(length, offset, count))
+            offset += length * count
+        for length in lengths:
+            index.write(''.join(sorted(buckets[length])))
+    return dict((length, len(buckets[length])) for length in lengths)
+
+
+class Dictionary(object):
+    """Read only view of an index written by build()"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as index:
+            if mmap:
+                self._data = mmap.mmap(index.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+            else:
+                self._data = index.read()
+        magic, count = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError('{} is not a dictionary index'.format(path))
+        self._buckets = {}
+        for i in range(count):
+            length, offset, words = BUCKET.unpack_from(
+                self._data, HEADER.size + i * BUCKET.size)
+            self._buckets[length] = (offset, words)
+
+    def count(self, length):
+        """Returns the number of words of the given length"""
+        return self._buckets.get(length, (0, 0))[1]
+
+    def word(self, length, i):
+        """Returns the i-th word of the given length"""
+        offset, _ = self._buckets[length]
+        start = offset + i * length
+        return self._data[start:start + length]
+
+    def random_word(self, length):
+        """Returns a random word of the given length.
+        Raises:
+            MissingLengthError: if there is no word of that length."""
+        count = self.count(length)
+        if not count:
+            raise MissingLengthError('No words of length {}'.format(length))
+        return self.word(length, random.randrange(count))
+
+    def fetch(self, length, limit):
+        """Returns limit random words of the given length"""
+        return [self.random_word(length) for _ in range(limit)]
+
+
+def main():
+    """Command line entry point to build the index from a word list"""
+    parser = argparse.ArgumentParser(
+        description='Build the offline dictionary index from a word list.')
+    parser.add_argument('words', help='plain text word list, one per line')
+    parser.add_argument('index', help='destination index file')
+    args = parser.parse_args()
+    with open(args.words) as words:
+        try:
+            counts = build(words, args.index)
+        except MissingLengthError as e:
+            parser.error(str(e))
+    for length in sorted(counts):
+        print '{:>3} letters: {} words'.format(length, counts[length])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""engine.py - Hangman move logic, independent of the Datastore. The engine
+is built from the state stored in a Game, applies guesses and exposes the new
+state. Letter positions of the target are precomputed once and guessed and
+failed letters are kept as bitmasks, so a guess only costs the positions it
+reveals."""
+
+STATUS_HIDDEN = '*'
+
+
+class IllegalMoveError(Exception):
+    """The guess is not allowed, the message explains why"""
+
+
+class MoveResult(object):
+    """Outcome of a legal guess"""
+    __slots__ = ('guess', 'success', 'end', 'message')
+
+    def __init__(self, guess, success, end, message):
+        self.guess = guess
+        self.success = success
+        self.end = end
+        self.message = message
+
+
+def _letter_index(char):
+    """Returns 0-25 for the letters a-z, None for any other character"""
+    index = ord(char) - 97
+    return index if 0 <= index < 26 else None
+
+
+class HangmanEngine(object):
+    """State of a game and the rules to play it.
+    Args:
+        target: the word to guess.
+        status_word: the target with the letters not guessed yet as '*'.
+        status_fails: the failed guesses, as sent by the player.
+        attempts_remaining: failed guesses still allowed."""
+    __slots__ = ('target', 'attempts_remaining', 'game_over', 'cancelled',
+                 '_status', '_hidden', '_fails', '_positions', '_other',
+                 '_revealed', '_failed', '_failed_other')
+
+    def __init__(self, target, status_word, status_fails, attempts_remaining,
+                 game_over=False, cancelled=False):
+        self.target = target
+        self.attempts_remaining = attempts_remaining
+        self.game_over = game_over
+        self.cancelled = cancelled
+        self._status = list(status_word)
+        self._hidden = self._status.count(STATUS_HIDDEN)
+        self._fails = list(status_fails)
+        # positions of every letter in the target: a-z in a 26 entry table,
+        # any other letter in a dict
+        self._positions = [()] * 26
+        self._other = {}
+        for i, char in enumerate(target):
+            index = _letter_index(char)
+            if index is None:
+                self._other[char] = self._other.get(char, ()) + (i,)
+            else:
+                self._positions[index] += (i,)
+        self._revealed = 0
+        for char in status_word:
+            index = _letter_index(char)
+            if index is not None:
+                self._revealed |= 1 << index
+        # failed guesses are compared as sent: single lowercase letters in a
+        # bitmask, words and any other character in a set
+        self._failed = 0
+        self._failed_other = set()
+        for fail in self._fails:
+            self._add_fail(fail)
+
+    @property
+    def status_word(self):
+        return ''.join(self._status)
+
+    @property
+    def status_fails(self):
+        return list(self._fails)
+
+    def guess(self, raw_guess):
+        """Applies a guess (a letter or the whole word) and returns its
+        MoveResult.
+        Raises:
+            IllegalMoveError: if the game is over or the guess not allowed."""
+        if self.game_over:
+            raise IllegalMoveError('Illegal action: Game is already over.')
+        if self.cancelled:
+            raise IllegalMoveError('Illegal action: Game already cancelled!.')
+
+        # guess to lowercase
+        guess = raw_guess.lower()
+        index = _letter_index(guess) if len(guess) == 1 else None
+
+        # manage ilegal movements
+        if self._is_failed(guess, index):
+            raise IllegalMoveError('Illegal action: Already failed.')
+        if not guess.isalpha():
+            raise IllegalMoveError('Illegal action: Guess must only contain '
+                                   'letters and at least one letter')
+        if (len(guess) != 1) and (len(guess) != len(self.target)):
+            raise IllegalMoveError('Illegal action: Guess must contain one '
+                                   'or {} letters.'.format(len(self.target)))
+        positions = self._letter_positions(guess, index)
+        # a letter at the beginning of the word can be played again
+        if self._is_revealed(guess, index) and \
+                positions and positions[0] > 0:
+            raise IllegalMoveError('Illegal action: Already played.')
+
+        # manage guess word attempt:
+        if len(guess) > 1 and (guess == self.target):
+            self._status = list(self.target)
+            self._hidden = 0
+            return self._end(guess, True, 'You win!, word is: -{0}-.'.format(
+                self.target))
+        # if char is in target word:
+        if positions:
+            for i in positions:
+                if self._status[i] == STATUS_HIDDEN:
+                    self._status[i] = guess
+                    self._hidden -= 1
+            if index is not None:
+                self._revealed |= 1 << index
+            status_word = self.status_word
+            if not self._hidden:
+                return self._end(guess, True,
+                                 'You win!, word is: -{0}-.'.format(
+                                     status_word))
+            return MoveResult(guess, True, False,
+                              'Good, -{0}- is in word: -{1}-.'.format(
+                                  guess, status_word))
+        # unless char found in word, or guess is target word
+        self._fails.append(raw_guess)
+        self._add_fail(raw_guess)
+        self.attempts_remaining -= 1
+        msg = 'Oh, oh, you failed.'
+        # manage game over
+        if self.attempts_remaining < 1:
+            return self._end(guess, False, msg + ' GAME OVER! word was: '
+                             '{0}'.format(self.target))
+        return MoveResult(guess, False, False, msg)
+
+    def _end(self, guess, success, message):
+        self.game_over = True
+        return MoveResult(guess, success, True, message)
+
+    def _letter_positions(self, guess, index):
+        if len(guess) != 1:
+            return ()
+        if index is None:
+            return self._other.get(guess, ())
+        return self._positions[index]
+
+    def _is_revealed(self, guess, index):
+        if index is not None:
+            return bool(self._revealed >> index & 1)
+        return len(guess) == 1 and guess in self._status
+
+    def _is_failed(self, guess, index):
+        if index is not None:
+            return bool(self._failed >> index & 1)
+        return guess in self._failed_other
+
+    def _add_fail(self, fail):
+        index = _letter_index(fail) if len(fail) == 1 else None
+        if index is None:
+            self._failed_other.add(fail)
+        else:
+            self._failed |= 1 << index
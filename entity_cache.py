@@ -0,0 +1,144 @@
+"""entity_cache.py - Read-through cache of hot entities (Games polled by
+get_game, Users), used by utils.get_by_urlsafe. An entity is looked up in a
+bounded LRU local to the instance, then in memcache, then in the Datastore,
+and kept in both caches once read. Every put or delete of a cached kind
+invalidates the key (see the hooks of the models), again when its
+transaction commits. The local copies of the other instances can't be
+invalidated and are trusted for LOCAL_SECONDS, so only the kinds listed in
+LOCAL_KINDS are kept locally: Users, whose cached reads (name, counter
+shards) tolerate it. Games, polled between moves, must never be served
+stale and are cached in memcache only."""
+
+import collections
+import os
+import threading
+import time
+
+from google.appengine.api import memcache
+from google.appengine.datastore import entity_pb
+from google.appengine.ext import ndb
+
+# kinds cached, the others are always read from the Datastore
+CACHED_KINDS = ('Game', 'User')
+# kinds also kept in the instance LRU, comma separated
+LOCAL_KINDS = tuple(
+    os.environ.get('ENTITY_CACHE_LOCAL_KINDS', 'User').split(','))
+LOCAL_SIZE = int(os.environ.get('ENTITY_CACHE_LOCAL_SIZE', 1000))
+LOCAL_SECONDS = float(os.environ.get('ENTITY_CACHE_LOCAL_SECONDS', 1))
+MEMCACHE_SECONDS = int(os.environ.get('ENTITY_CACHE_MEMCACHE_SECONDS', 600))
+# memcache refuses to store the key again for this long after an
+# invalidation, a reader of the entity before the commit can't put it back
+INVALIDATION_LOCK_SECONDS = 2
+NAMESPACE = 'entities'
+
+
+class LocalCache(object):
+    """Thread-safe LRU of serialized entities with a time to live"""
+
+    def __init__(self, max_size=LOCAL_SIZE, seconds=LOCAL_SECONDS,
+                 clock=time.time):
+        self.max_size = max_size
+        self.seconds = seconds
+        self.clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < self.clock():
+                return None
+            self._entries[key] = entry
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self.clock() + self.seconds, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local = LocalCache()
+_stats_lock = threading.Lock()
+_stats = collections.defaultdict(
+    lambda: {'local': 0, 'memcache': 0, 'datastore': 0})
+
+
+def _serialize(entity):
+    return ndb.model_to_protobuf(entity).Encode()
+
+
+def _deserialize(data):
+    return ndb.model_from_protobuf(entity_pb.EntityProto(data))
+
+
+def _count(kind, tier):
+    with _stats_lock:
+        _stats[kind][tier] += 1
+
+
+def get(key):
+    """Returns the entity of key (or None), read through the caches.
+    Transactions must read the Datastore, call key.get() there."""
+    kind = key.kind()
+    if kind not in CACHED_KINDS:
+        return key.get()
+    cache_key = key.urlsafe()
+    use_local = kind in LOCAL_KINDS
+    data = local.get(cache_key) if use_local else None
+    if data is not None:
+        _count(kind, 'local')
+        return _deserialize(data)
+    data = memcache.get(cache_key, namespace=NAMESPACE)
+    if data is not None:
+        _count(kind, 'memcache')
+        if use_local:
+            local.set(cache_key, data)
+        return _deserialize(data)
+    _count(kind, 'datastore')
+    # ndb's own memcache would only be a second lookup of the same kind
+    entity = key.get(use_memcache=False)
+    if entity is not None:
+        data = _serialize(entity)
+        # add fails while the key is locked by an invalidation
+        if memcache.add(cache_key, data, time=MEMCACHE_SECONDS,
+                        namespace=NAMESPACE) and use_local:
+            local.set(cache_key, data)
+    return entity
+
+
+def invalidate(key):
+    """Drops key from the caches, now and when the current transaction (if
+    any) commits"""
+    if key.kind() not in CACHED_KINDS:
+        return
+    _invalidate(key.urlsafe())
+    if ndb.in_transaction():
+        cache_key = key.urlsafe()
+        ndb.get_context().call_on_commit(lambda: _invalidate(cache_key))
+
+
+def _invalidate(cache_key):
+    local.delete(cache_key)
+    memcache.delete(cache_key, seconds=INVALIDATION_LOCK_SECONDS,
+                    namespace=NAMESPACE)
+
+
+def get_stats():
+    """Returns the reads served by each tier and the hit ratio (reads not
+    served by the Datastore) of every kind on this instance"""
+    with _stats_lock:
+        stats = dict((kind, dict(tiers)) for kind, tiers in _stats.items())
+    for tiers in stats.values():
+        reads = sum(tiers.values())
+        tiers['hit_ratio'] = round(
+            float(reads - tiers['datastore']) / reads, 3) if reads else None
+    return {'kinds': stats, 'local_entries': len(local)}
@@ -1,31 +1,273 @@
 # -*- coding: utf-8 -*-`
-"""game.py - Generate target word from wordnik API."""
+"""game.py - Generate target word from wordnik API or a local dictionary."""
 
-from wordnik import swagger, WordsApi
+import collections
+import httplib
+import logging
+import os
+import random
+import threading
+import time
 
-WORDNIK_API_URL = 'http://api.wordnik.com/v4'
+from breaker import CircuitBreaker, CircuitOpenError
+from wordpool import WordPool, EmptyPoolError
+from dictionary import Dictionary, MissingLengthError
+
+# 'shared' (Datastore pool shared by all instances and refilled from Wordnik
+# by a task), 'wordnik' (every instance calls Wordnik) or 'dictionary'
+# (offline word list, see dictionary.py)
+WORD_SOURCE = os.environ.get('WORD_SOURCE', 'shared')
+DICTIONARY_PATH = os.path.join(os.path.dirname(__file__), 'dictionary.bin')
+# can point to a local stub server, see wordnik_stub.py
+WORDNIK_API_URL = os.environ.get('WORDNIK_API_URL',
+                                 'http://api.wordnik.com/v4')
 WORDNIK_KEY = 'your-wordnik-api-key'
-client = swagger.ApiClient(WORDNIK_KEY, WORDNIK_API_URL)
-wordApi = WordsApi.WordsApi(client)
+# seconds before a Wordnik call is abandoned
+WORDNIK_TIMEOUT = 3
+# the Wordnik client is built on first use (see get_client), instances that
+# never create a game don't load the wordnik package
+client = None
+wordApi = None
+batch = None
+_client_lock = threading.Lock()
+# stop calling Wordnik while it is down or too slow
+breaker = CircuitBreaker()
+
+# errors of a Wordnik call, the game is then served from a local word source
+WORDNIK_ERRORS = (CircuitOpenError, EmptyPoolError, IOError,
+                  httplib.HTTPException)
+
+# last resort words when Wordnik fails and there is no offline dictionary
+FALLBACK_WORDS = {
+    5: ['apple', 'house', 'river', 'plant', 'chair', 'light'],
+    6: ['garden', 'planet', 'bridge', 'castle', 'forest', 'winter'],
+    7: ['kitchen', 'library', 'picture', 'teacher', 'weather', 'balloon'],
+    8: ['elephant', 'mountain', 'treasure', 'children', 'notebook'],
+    9: ['butterfly', 'chocolate', 'adventure', 'telephone', 'newspaper'],
+    10: ['basketball', 'strawberry', 'friendship', 'helicopter'],
+}
+
+
+def get_client():
+    """ Returns the Wordnik client, built on first use """
+    global client, wordApi, batch
+    if client is None:
+        with _client_lock:
+            if client is None:
+                from wordnik import swagger, WordsApi
+                from wordnik_batch import ConcurrentWordnik
+                from wordnik_cache import default_cache
+                transport = swagger.HTTPTransport(timeout=WORDNIK_TIMEOUT)
+                new_client = swagger.ApiClient(WORDNIK_KEY, WORDNIK_API_URL,
+                                               transport, default_cache())
+                wordApi = WordsApi.WordsApi(new_client)
+                batch = ConcurrentWordnik(new_client)
+                client = new_client
+    return client
+
+
+# candidates received from Wordnik and rejected (non alpha) by word length
+_stats_lock = threading.Lock()
+_fetch_stats = collections.defaultdict(
+    lambda: {'calls': 0, 'candidates': 0, 'rejected': 0})
+
+
+def get_fetch_stats():
+    """ Returns the Wordnik fetch statistics by word length, the rejected
+    ratio of each length is useful to tune its batch size """
+    with _stats_lock:
+        return dict((length, dict(stats))
+                    for length, stats in _fetch_stats.items())
+
+
+def fetch_words(length, limit):
+    """ Returns up to limit valid words of the given length from Wordnik,
+    all candidates of the batch are filtered locally in a single pass """
+    get_client()
+    words = breaker.call(
+        wordApi.getRandomWords,
+        hasDictionaryDef=True,
+        includePartOfSpeech='noun',
+        minCorpusCount=0,
+        maxCorpusCount=-1,
+        minDictionaryCount=1,
+        maxDictionaryCount=-1,
+        minLength=length,
+        maxLength=length,
+        limit=limit
+        ) or []
+    # avoid to return a non-valid word (with non alpha characters)
+    valid = [word.word.lower() for word in words if word.word.isalpha()]
+    rejected = len(words) - len(valid)
+    with _stats_lock:
+        stats = _fetch_stats[length]
+        stats['calls'] += 1
+        stats['candidates'] += len(words)
+        stats['rejected'] += rejected
+    logging.info('Fetched %d words of length %d, %d rejected',
+                 len(words), length, rejected)
+    return valid
+
+def claim_words(length, limit):
+    """ Returns at least limit words of the given length claimed from the
+    shared pool, in whole batches. Enqueues a refill of the shared pool when
+    it runs low, and calls Wordnik directly when it is empty """
+    from google.appengine.api import datastore_errors
+    from models import WordPoolShard, WORD_BATCH_SIZE, WORD_POOL_LOW_WATER
+    words = []
+    left = 0
+    for _ in range(-(-limit // WORD_BATCH_SIZE)):
+        try:
+            batch, left = WordPoolShard.claim(length)
+        except datastore_errors.Error as e:
+            # e.g. many instances claiming the same length at once
+            logging.warning('Could not claim words of length %d: %s',
+                            length, e)
+            break
+        words.extend(batch)
+        if not left:
+            break
+    if left < WORD_POOL_LOW_WATER:
+        # the word is served anyway, the next claims will ask again
+        try:
+            request_shared_refill(length)
+        except Exception:
+            logging.exception('Could not enqueue the refill of length %d',
+                              length)
+    if not words:
+        words = fetch_words(length, limit)
+    return words
+
+
+def request_shared_refill(length):
+    """ Enqueues the refill task of the shared pool of the given length, at
+    most once a minute whatever the number of instances asking for it """
+    from google.appengine.api import taskqueue
+    name = 'refill-word-pool-{}-{}'.format(length, int(time.time() // 60))
+    try:
+        taskqueue.add(url='/tasks/refill_word_pool', name=name,
+                      params={'length': length})
+    except (taskqueue.TaskAlreadyExistsError,
+            taskqueue.TombstonedTaskError):
+        pass
+
+
+def refill_shared_pool(length):
+    """ Fills every shard of the shared pool of the given length from
+    Wordnik and deletes the batches already claimed. Run by the refill task
+    only. Returns the batches available """
+    from models import WordPoolShard, WORD_BATCH_SIZE, WORD_POOL_BATCHES
+    available = WordPoolShard.available(length)
+    # the emptiest shards first, so a partial refill is spread evenly
+    missing = sorted((level, key) for key in available
+                     for level in range(available[key], WORD_POOL_BATCHES))
+    for _, key in missing:
+        words = fetch_words(length, WORD_BATCH_SIZE)
+        if not words:
+            break
+        available[key] = WordPoolShard.add_batch(key, words)
+    WordPoolShard.prune(length)
+    return sum(available.values())
+
+# lengths refilled by an instance in the last DEMAND_SECONDS, fleet-wide, so
+# new instances only warm up the lengths being played
+DEMAND_SECONDS = 600
+DEMAND_KEY = 'word_demand:{}'
+
+
+def fetch_for_pool(length, limit):
+    """ Fetch of the instance word pools: records the demand for the length
+    and claims (shared source) or fetches the words """
+    from google.appengine.api import memcache
+    memcache.set(DEMAND_KEY.format(length), True, time=DEMAND_SECONDS)
+    if WORD_SOURCE == 'shared':
+        return claim_words(length, limit)
+    return fetch_words(length, limit)
+
+
+def played_lengths(lengths):
+    """ Returns the lengths refilled by an instance in the last
+    DEMAND_SECONDS """
+    from google.appengine.api import memcache
+    played = memcache.get_multi([DEMAND_KEY.format(length)
+                                 for length in lengths])
+    return [length for length in lengths
+            if DEMAND_KEY.format(length) in played]
+
+
+# words are fetched in bulk and served from memory, the surplus of a batch is
+# kept for the next games and a game makes at most max_refills Wordnik calls.
+# The pool of each length grows and shrinks with its demand. With the shared
+# source a pool running low enqueues the refill of the shared pool, so the
+# refill of the instance pool is a Datastore claim, not a Wordnik call.
+if WORD_SOURCE == 'shared':
+    pool = WordPool(fetch_for_pool, on_low_water=request_shared_refill)
+else:
+    pool = WordPool(fetch_for_pool)
+
+
+def refill_pools(lengths):
+    """ Refills the word pool of every length in parallel, it takes as long
+    as the slowest Wordnik call """
+    get_client()
+    batch.pool.map(pool.refill, lengths)
+
+_dictionary = None
+_fallback_games = collections.Counter()
+
+
+def get_dictionary():
+    """ Returns the offline dictionary, opened on first use """
+    global _dictionary
+    if _dictionary is None:
+        _dictionary = Dictionary(DICTIONARY_PATH)
+    return _dictionary
+
+
+def get_fallback_word(length):
+    """ Returns a word from the offline dictionary if it has been built,
+    otherwise from the built-in FALLBACK_WORDS """
+    if os.path.exists(DICTIONARY_PATH):
+        try:
+            return get_dictionary().random_word(length)
+        except MissingLengthError:
+            logging.error('The dictionary has no words of length %d', length)
+    return random.choice(FALLBACK_WORDS[length])
+
+
+def get_breaker_stats():
+    """ Returns the Wordnik circuit breaker state and counters, with the
+    number of games served from the fallback word source by length """
+    stats = breaker.stats()
+    with _stats_lock:
+        stats['fallback_games'] = dict(_fallback_games)
+    return stats
+
+
+def get_metrics():
+    """ Returns the word source metrics of this instance: demand and level
+    of the word pool of every length, Wordnik fetch statistics and circuit
+    breaker state """
+    return {'word_source': WORD_SOURCE,
+            'pools': pool.metrics(),
+            'fetches': get_fetch_stats(),
+            'breaker': get_breaker_stats()}
+
 
 def get_target(length):
     """ Retuns the word for the game """
-    isValid = False
-    # get a word from Wordnik API
-    # avoid to return a non-valid word (with non alpha characters)
-    while not isValid:
-        word = wordApi.getRandomWord(
-            hasDictionaryDef=True,
-            includePartOfSpeech='noun',
-            minCorpusCount=0,
-            maxCorpusCount=-1,
-            minDictionaryCount=1,
-            maxDictionaryCount=-1,
-            minLength=length,
-            maxLength=length
-            )
-        isValid = word.word.isalpha()
+    if WORD_SOURCE == 'dictionary':
+        word = get_fallback_word(length)
+    else:
+        try:
+            word = pool.pop(length)
+        except WORDNIK_ERRORS as e:
+            logging.warning('Wordnik unavailable (%s), serving a fallback '
+                            'word of length %d', e, length)
+            with _stats_lock:
+                _fallback_games[length] += 1
+            word = get_fallback_word(length)
     print '-------------------------'
-    print word.word.lower()
+    print word
     print '-------------------------'
-    return word.word.lower()
+    return word
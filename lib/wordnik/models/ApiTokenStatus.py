@@ -14,23 +14,23 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class ApiTokenStatus:
+class ApiTokenStatus(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'valid': 'bool',
+        'token': 'str',
+        'resetsInMillis': 'long',
+        'remainingCalls': 'long',
+        'expiresInMillis': 'long',
+        'totalRequests': 'long'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'valid': 'bool',
-            'token': 'str',
-            'resetsInMillis': 'long',
-            'remainingCalls': 'long',
-            'expiresInMillis': 'long',
-            'totalRequests': 'long'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.valid = None # bool
         self.token = None # str
         self.resetsInMillis = None # long
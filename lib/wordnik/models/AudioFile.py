@@ -14,31 +14,31 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class AudioFile:
+class AudioFile(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'attributionUrl': 'str',
+        'commentCount': 'int',
+        'voteCount': 'int',
+        'fileUrl': 'str',
+        'audioType': 'str',
+        'id': 'long',
+        'duration': 'float',
+        'attributionText': 'str',
+        'createdBy': 'str',
+        'description': 'str',
+        'createdAt': 'datetime',
+        'voteWeightedAverage': 'float',
+        'voteAverage': 'float',
+        'word': 'str'
+
+    }
+
+    __slots__ = tuple(swaggerTypes)
 
     def __init__(self):
-        self.swaggerTypes = {
-            'attributionUrl': 'str',
-            'commentCount': 'int',
-            'voteCount': 'int',
-            'fileUrl': 'str',
-            'audioType': 'str',
-            'id': 'long',
-            'duration': 'float',
-            'attributionText': 'str',
-            'createdBy': 'str',
-            'description': 'str',
-            'createdAt': 'datetime',
-            'voteWeightedAverage': 'float',
-            'voteAverage': 'float',
-            'word': 'str'
-
-        }
-
-
         self.attributionUrl = None # str
         self.commentCount = None # int
         self.voteCount = None # int
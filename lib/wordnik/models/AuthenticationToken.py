@@ -14,20 +14,20 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class AuthenticationToken:
+class AuthenticationToken(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'token': 'str',
+        'userId': 'long',
+        'userSignature': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'token': 'str',
-            'userId': 'long',
-            'userSignature': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.token = None # str
         self.userId = None # long
         self.userSignature = None # str
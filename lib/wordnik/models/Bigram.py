@@ -14,22 +14,22 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Bigram:
+class Bigram(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'count': 'long',
+        'gram2': 'str',
+        'gram1': 'str',
+        'wlmi': 'float',
+        'mi': 'float'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'count': 'long',
-            'gram2': 'str',
-            'gram1': 'str',
-            'wlmi': 'float',
-            'mi': 'float'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.count = None # long
         self.gram2 = None # str
         self.gram1 = None # str
@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Citation:
+class Citation(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'cite': 'str',
+        'source': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'cite': 'str',
-            'source': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.cite = None # str
         self.source = None # str
         
@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class ContentProvider:
+class ContentProvider(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'int',
+        'name': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'int',
-            'name': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # int
         self.name = None # str
         
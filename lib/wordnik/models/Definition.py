@@ -14,33 +14,33 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Definition:
+class Definition(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'extendedText': 'str',
+        'text': 'str',
+        'sourceDictionary': 'str',
+        'citations': 'list[Citation]',
+        'labels': 'list[Label]',
+        'score': 'float',
+        'exampleUses': 'list[ExampleUsage]',
+        'attributionUrl': 'str',
+        'seqString': 'str',
+        'attributionText': 'str',
+        'relatedWords': 'list[Related]',
+        'sequence': 'str',
+        'word': 'str',
+        'notes': 'list[Note]',
+        'textProns': 'list[TextPron]',
+        'partOfSpeech': 'str'
+
+    }
+
+    __slots__ = tuple(swaggerTypes)
 
     def __init__(self):
-        self.swaggerTypes = {
-            'extendedText': 'str',
-            'text': 'str',
-            'sourceDictionary': 'str',
-            'citations': 'list[Citation]',
-            'labels': 'list[Label]',
-            'score': 'float',
-            'exampleUses': 'list[ExampleUsage]',
-            'attributionUrl': 'str',
-            'seqString': 'str',
-            'attributionText': 'str',
-            'relatedWords': 'list[Related]',
-            'sequence': 'str',
-            'word': 'str',
-            'notes': 'list[Note]',
-            'textProns': 'list[TextPron]',
-            'partOfSpeech': 'str'
-
-        }
-
-
         self.extendedText = None # str
         self.text = None # str
         self.sourceDictionary = None # str
@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class DefinitionSearchResults:
+class DefinitionSearchResults(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'results': 'list[Definition]',
+        'totalResults': 'int'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'results': 'list[Definition]',
-            'totalResults': 'int'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.results = None # list[Definition]
         self.totalResults = None # int
         
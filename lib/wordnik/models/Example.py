@@ -14,29 +14,29 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Example:
+class Example(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'long',
+        'exampleId': 'long',
+        'title': 'str',
+        'text': 'str',
+        'score': 'ScoredWord',
+        'sentence': 'Sentence',
+        'word': 'str',
+        'provider': 'ContentProvider',
+        'year': 'int',
+        'rating': 'float',
+        'documentId': 'long',
+        'url': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'long',
-            'exampleId': 'long',
-            'title': 'str',
-            'text': 'str',
-            'score': 'ScoredWord',
-            'sentence': 'Sentence',
-            'word': 'str',
-            'provider': 'ContentProvider',
-            'year': 'int',
-            'rating': 'float',
-            'documentId': 'long',
-            'url': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # long
         self.exampleId = None # long
         self.title = None # str
@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class ExampleSearchResults:
+class ExampleSearchResults(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'facets': 'list[Facet]',
+        'examples': 'list[Example]'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'facets': 'list[Facet]',
-            'examples': 'list[Example]'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.facets = None # list[Facet]
         self.examples = None # list[Example]
         
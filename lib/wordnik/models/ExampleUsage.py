@@ -14,17 +14,17 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class ExampleUsage:
+class ExampleUsage(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'text': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'text': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.text = None # str
         
@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Facet:
+class Facet(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'facetValues': 'list[FacetValue]',
+        'name': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'facetValues': 'list[FacetValue]',
-            'name': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.facetValues = None # list[FacetValue]
         self.name = None # str
         
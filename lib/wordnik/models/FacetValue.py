@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class FacetValue:
+class FacetValue(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'count': 'long',
+        'value': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'count': 'long',
-            'value': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.count = None # long
         self.value = None # str
         
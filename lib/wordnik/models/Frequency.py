@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Frequency:
+class Frequency(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'count': 'long',
+        'year': 'int'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'count': 'long',
-            'year': 'int'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.count = None # long
         self.year = None # int
         
@@ -14,22 +14,22 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class FrequencySummary:
+class FrequencySummary(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'unknownYearCount': 'int',
+        'totalCount': 'long',
+        'frequencyString': 'str',
+        'word': 'str',
+        'frequency': 'list[Frequency]'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'unknownYearCount': 'int',
-            'totalCount': 'long',
-            'frequencyString': 'str',
-            'word': 'str',
-            'frequency': 'list[Frequency]'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.unknownYearCount = None # int
         self.totalCount = None # long
         self.frequencyString = None # str
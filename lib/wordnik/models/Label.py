@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Label:
+class Label(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'text': 'str',
+        'type': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'text': 'str',
-            'type': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.text = None # str
         self.type = None # str
         
@@ -14,21 +14,21 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Note:
+class Note(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'noteType': 'str',
+        'appliesTo': 'list[str]',
+        'value': 'str',
+        'pos': 'int'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'noteType': 'str',
-            'appliesTo': 'list[str]',
-            'value': 'str',
-            'pos': 'int'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.noteType = None # str
         self.appliesTo = None # list[str]
         self.value = None # str
@@ -14,24 +14,24 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Related:
+class Related(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'label1': 'str',
+        'relationshipType': 'str',
+        'label2': 'str',
+        'label3': 'str',
+        'words': 'list[str]',
+        'gram': 'str',
+        'label4': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'label1': 'str',
-            'relationshipType': 'str',
-            'label2': 'str',
-            'label3': 'str',
-            'words': 'list[str]',
-            'gram': 'str',
-            'label4': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.label1 = None # str
         self.relationshipType = None # str
         self.label2 = None # str
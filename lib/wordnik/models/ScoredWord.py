@@ -14,28 +14,28 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class ScoredWord:
+class ScoredWord(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'position': 'int',
+        'id': 'long',
+        'docTermCount': 'int',
+        'lemma': 'str',
+        'wordType': 'str',
+        'score': 'float',
+        'sentenceId': 'long',
+        'word': 'str',
+        'stopword': 'bool',
+        'baseWordScore': 'float',
+        'partOfSpeech': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'position': 'int',
-            'id': 'long',
-            'docTermCount': 'int',
-            'lemma': 'str',
-            'wordType': 'str',
-            'score': 'float',
-            'sentenceId': 'long',
-            'word': 'str',
-            'stopword': 'bool',
-            'baseWordScore': 'float',
-            'partOfSpeech': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.position = None # int
         self.id = None # long
         self.docTermCount = None # int
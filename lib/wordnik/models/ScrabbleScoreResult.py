@@ -14,17 +14,17 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class ScrabbleScoreResult:
+class ScrabbleScoreResult(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'value': 'int'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'value': 'int'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.value = None # int
         
@@ -14,23 +14,23 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Sentence:
+class Sentence(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'hasScoredWords': 'bool',
+        'id': 'long',
+        'scoredWords': 'list[ScoredWord]',
+        'display': 'str',
+        'rating': 'int',
+        'documentMetadataId': 'long'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'hasScoredWords': 'bool',
-            'id': 'long',
-            'scoredWords': 'list[ScoredWord]',
-            'display': 'str',
-            'rating': 'int',
-            'documentMetadataId': 'long'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.hasScoredWords = None # bool
         self.id = None # long
         self.scoredWords = None # list[ScoredWord]
@@ -14,21 +14,21 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class SimpleDefinition:
+class SimpleDefinition(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'text': 'str',
+        'source': 'str',
+        'note': 'str',
+        'partOfSpeech': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'text': 'str',
-            'source': 'str',
-            'note': 'str',
-            'partOfSpeech': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.text = None # str
         self.source = None # str
         self.note = None # str
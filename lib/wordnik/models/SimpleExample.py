@@ -14,21 +14,21 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class SimpleExample:
+class SimpleExample(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'long',
+        'title': 'str',
+        'text': 'str',
+        'url': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'long',
-            'title': 'str',
-            'text': 'str',
-            'url': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # long
         self.title = None # str
         self.text = None # str
@@ -14,20 +14,20 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class Syllable:
+class Syllable(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'text': 'str',
+        'seq': 'int',
+        'type': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'text': 'str',
-            'seq': 'int',
-            'type': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.text = None # str
         self.seq = None # int
         self.type = None # str
@@ -14,20 +14,20 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class TextPron:
+class TextPron(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'raw': 'str',
+        'seq': 'int',
+        'rawType': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'raw': 'str',
-            'seq': 'int',
-            'rawType': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.raw = None # str
         self.seq = None # int
         self.rawType = None # str
@@ -14,25 +14,25 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class User:
+class User(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'long',
+        'username': 'str',
+        'email': 'str',
+        'status': 'int',
+        'faceBookId': 'str',
+        'userName': 'str',
+        'displayName': 'str',
+        'password': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'long',
-            'username': 'str',
-            'email': 'str',
-            'status': 'int',
-            'faceBookId': 'str',
-            'userName': 'str',
-            'displayName': 'str',
-            'password': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # long
         self.username = None # str
         self.email = None # str
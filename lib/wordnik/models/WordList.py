@@ -14,28 +14,28 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class WordList:
+class WordList(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'long',
+        'permalink': 'str',
+        'name': 'str',
+        'createdAt': 'datetime',
+        'updatedAt': 'datetime',
+        'lastActivityAt': 'datetime',
+        'username': 'str',
+        'userId': 'long',
+        'description': 'str',
+        'numberWordsInList': 'long',
+        'type': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'long',
-            'permalink': 'str',
-            'name': 'str',
-            'createdAt': 'datetime',
-            'updatedAt': 'datetime',
-            'lastActivityAt': 'datetime',
-            'username': 'str',
-            'userId': 'long',
-            'description': 'str',
-            'numberWordsInList': 'long',
-            'type': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # long
         self.permalink = None # str
         self.name = None # str
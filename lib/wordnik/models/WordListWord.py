@@ -14,24 +14,24 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class WordListWord:
+class WordListWord(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'long',
+        'word': 'str',
+        'username': 'str',
+        'userId': 'long',
+        'createdAt': 'datetime',
+        'numberCommentsOnWord': 'long',
+        'numberLists': 'long'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'long',
-            'word': 'str',
-            'username': 'str',
-            'userId': 'long',
-            'createdAt': 'datetime',
-            'numberCommentsOnWord': 'long',
-            'numberLists': 'long'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # long
         self.word = None # str
         self.username = None # str
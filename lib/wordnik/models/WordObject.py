@@ -14,23 +14,23 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class WordObject:
+class WordObject(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'long',
+        'word': 'str',
+        'originalWord': 'str',
+        'suggestions': 'list[str]',
+        'canonicalForm': 'str',
+        'vulgar': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'long',
-            'word': 'str',
-            'originalWord': 'str',
-            'suggestions': 'list[str]',
-            'canonicalForm': 'str',
-            'vulgar': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # long
         self.word = None # str
         self.originalWord = None # str
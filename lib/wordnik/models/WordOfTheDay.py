@@ -14,29 +14,29 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class WordOfTheDay:
+class WordOfTheDay(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'id': 'long',
+        'parentId': 'str',
+        'category': 'str',
+        'createdBy': 'str',
+        'createdAt': 'datetime',
+        'contentProvider': 'ContentProvider',
+        'htmlExtra': 'str',
+        'word': 'str',
+        'definitions': 'list[SimpleDefinition]',
+        'examples': 'list[SimpleExample]',
+        'note': 'str',
+        'publishDate': 'datetime'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'id': 'long',
-            'parentId': 'str',
-            'category': 'str',
-            'createdBy': 'str',
-            'createdAt': 'datetime',
-            'contentProvider': 'ContentProvider',
-            'htmlExtra': 'str',
-            'word': 'str',
-            'definitions': 'list[SimpleDefinition]',
-            'examples': 'list[SimpleExample]',
-            'note': 'str',
-            'publishDate': 'datetime'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.id = None # long
         self.parentId = None # str
         self.category = None # str
@@ -14,20 +14,20 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class WordSearchResult:
+class WordSearchResult(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'count': 'long',
+        'lexicality': 'float',
+        'word': 'str'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'count': 'long',
-            'lexicality': 'float',
-            'word': 'str'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.count = None # long
         self.lexicality = None # float
         self.word = None # str
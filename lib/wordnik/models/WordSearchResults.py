@@ -14,19 +14,19 @@ Copyright 2012 Wordnik, Inc.
     See the License for the specific language governing permissions and
     limitations under the License.
 """
-class WordSearchResults:
+class WordSearchResults(object):
     """NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually."""
 
+    swaggerTypes = {
+        'searchResults': 'list[WordSearchResult]',
+        'totalResults': 'int'
 
-    def __init__(self):
-        self.swaggerTypes = {
-            'searchResults': 'list[WordSearchResult]',
-            'totalResults': 'int'
-
-        }
+    }
 
+    __slots__ = tuple(swaggerTypes)
 
+    def __init__(self):
         self.searchResults = None # list[WordSearchResult]
         self.totalResults = None # int
         
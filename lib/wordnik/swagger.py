@@ -6,12 +6,16 @@ templates."""
 
 import sys
 import os
-import re
 import urllib
 import urllib2
 import httplib
 import json
 import datetime
+import socket
+import threading
+import time
+import urlparse
+from StringIO import StringIO
 
 from models import *
 
@@ -19,13 +23,21 @@ from models import *
 class ApiClient:
     """Generic API client for Swagger client library builds"""
 
-    def __init__(self, apiKey=None, apiServer=None):
+    def __init__(self, apiKey=None, apiServer=None, transport=None,
+                 cache=None):
         if apiKey == None:
             raise Exception('You must pass an apiKey when instantiating the '
                             'APIClient')
         self.apiKey = apiKey
         self.apiServer = apiServer
         self.cookie = None
+        # Any object with a request(method, url, headers, data) method
+        # returning a Response, e.g. a local fake in tests
+        self.transport = transport or HTTPTransport()
+        # Optional cache of GET responses, any object with ttl(resourcePath),
+        # get(key) and set(key, value, ttl) methods. ttl returns None for
+        # resources that must not be cached.
+        self.cache = cache
 
     def callAPI(self, resourcePath, method, queryParams, postData,
                 headerParams=None):
@@ -43,17 +55,28 @@ class ApiClient:
             headers['Cookie'] = self.cookie
 
         data = None
+        cacheKey = None
+        cacheTtl = None
 
         if method == 'GET':
 
+            sentQueryParams = {}
             if queryParams:
                 # Need to remove None values, these should not be sent
-                sentQueryParams = {}
                 for param, value in queryParams.items():
                     if value != None:
                         sentQueryParams[param] = value
                 url = url + '?' + urllib.urlencode(sentQueryParams)
 
+            if self.cache:
+                cacheTtl = self.cache.ttl(resourcePath)
+            if cacheTtl is not None:
+                cacheKey = resourcePath + '?' + urllib.urlencode(
+                    sorted(sentQueryParams.items()))
+                string = self.cache.get(cacheKey)
+                if string is not None:
+                    return self._decodeBody(string)
+
         elif method in ['POST', 'PUT', 'DELETE']:
 
             if postData:
@@ -64,15 +87,17 @@ class ApiClient:
         else:
             raise Exception('Method ' + method + ' is not recognized.')
 
-        request = MethodRequest(method=method, url=url, headers=headers,
-                                data=data)
-
         # Make the request
-        response = urllib2.urlopen(request)
+        response = self.transport.request(method, url, headers, data)
         if 'Set-Cookie' in response.headers:
             self.cookie = response.headers['Set-Cookie']
-        string = response.read()
+        string = response.body
+        if cacheKey:
+            self.cache.set(cacheKey, string, cacheTtl)
+
+        return self._decodeBody(string)
 
+    def _decodeBody(self, string):
         try:
             data = json.loads(string)
         except ValueError:  # PUT requests don't return anything
@@ -111,7 +136,10 @@ class ApiClient:
             if type(obj) == dict:
                 objDict = obj
             else:
-                objDict = obj.__dict__
+                # model classes use __slots__, their attributes are the
+                # keys of swaggerTypes
+                objDict = dict((key, getattr(obj, key))
+                               for key in obj.swaggerTypes)
             return {key: self.sanitizeForSerialization(val)
                     for (key, val) in objDict.iteritems()
                     if key != 'swaggerTypes'}
@@ -137,60 +165,227 @@ class ApiClient:
 
         # Have to accept objClass as string or actual type. Type could be a
         # native Python type, or one of the model classes.
-        if type(objClass) == str:
-            if 'list[' in objClass:
-                match = re.match('list\[(.*)\]', objClass)
-                subClass = match.group(1)
-                return [self.deserialize(subObj, subClass) for subObj in obj]
-
-            if (objClass in ['int', 'float', 'long', 'dict', 'list', 'str', 'bool', 'datetime']):
-                objClass = eval(objClass)
-            else:  # not a native type, must be model class
-                objClass = eval(objClass + '.' + objClass)
-
-        if objClass == str:
-            return obj
-        elif objClass in [int, long, float, dict, list, bool]:
-            return objClass(obj)
-        elif objClass == datetime:
-            # Server will always return a time stamp in UTC, but with
-            # trailing +0000 indicating no offset from UTC. So don't process
-            # last 5 characters.
-            return datetime.datetime.strptime(obj[:-5],
-                                              "%Y-%m-%dT%H:%M:%S.%f")
-
-        instance = objClass()
-
-        for attr, attrType in instance.swaggerTypes.iteritems():
-            if attr in obj:
-                value = obj[attr]
-                if attrType in ['str', 'int', 'long', 'float', 'bool']:
-                    attrType = eval(attrType)
-                    try:
-                        value = attrType(value)
-                    except UnicodeEncodeError:
-                        value = unicode(value)
-                    setattr(instance, attr, value)
-                elif (attrType == 'datetime'):
-                    setattr(instance, attr, datetime.datetime.strptime(value[:-5],
-                                              "%Y-%m-%dT%H:%M:%S.%f"))
-                elif 'list[' in attrType:
-                    match = re.match('list\[(.*)\]', attrType)
-                    subClass = match.group(1)
-                    subValues = []
-                    if not value:
-                        setattr(instance, attr, None)
-                    else:
-                        for subValue in value:
-                            subValues.append(self.deserialize(subValue,
-                                                              subClass))
-                    setattr(instance, attr, subValues)
-                else:
-                    setattr(instance, attr, self.deserialize(value,
-                                                             objClass))
-
+        if type(objClass) != str:
+            objClass = objClass.__name__
+        return getDecoder(objClass)(obj)
+
+
+# Decoders compiled from the swagger type names, built once per type and
+# reused for every object. Type names are resolved without eval.
+_decoders = {}
+_decodersLock = threading.Lock()
+
+_nativeTypes = {'int': int, 'long': long, 'float': float, 'dict': dict,
+                'list': list, 'bool': bool}
+
+
+def _decodeStr(value):
+    try:
+        return str(value)
+    except UnicodeEncodeError:
+        return unicode(value)
+
+
+def _decodeDatetime(value):
+    # Server will always return a time stamp in UTC, but with
+    # trailing +0000 indicating no offset from UTC. So don't process
+    # last 5 characters.
+    return datetime.datetime.strptime(value[:-5], "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def getDecoder(typeName):
+    """Returns the function decoding a JSON value of the given swagger type
+    name ('str', 'list[Definition]', 'WordObject'...)."""
+    decoder = _decoders.get(typeName)
+    if decoder is None:
+        with _decodersLock:
+            decoder = _decoders.get(typeName)
+            if decoder is None:
+                # compiled aside and published when complete, readers
+                # without the lock never see a model with missing fields
+                compiled = {}
+                decoder = _compileDecoder(typeName, compiled)
+                _decoders.update(compiled)
+    return decoder
+
+
+def _findDecoder(typeName, compiled):
+    """Returns the decoder of typeName, compiling it into compiled if it is
+    not known yet"""
+    decoder = compiled.get(typeName) or _decoders.get(typeName)
+    if decoder is None:
+        decoder = _compileDecoder(typeName, compiled)
+    return decoder
+
+
+def _compileDecoder(typeName, compiled):
+    """Builds the decoder of typeName and the decoders it needs into
+    compiled. Must be called with _decodersLock held."""
+    if typeName.startswith('list[') and typeName.endswith(']'):
+        decodeItem = _findDecoder(typeName[5:-1], compiled)
+
+        def decodeList(value):
+            if not value:
+                return []
+            return [decodeItem(item) for item in value]
+
+        compiled[typeName] = decodeList
+        return decodeList
+
+    if typeName == 'str':
+        decoder = _decodeStr
+    elif typeName == 'datetime':
+        decoder = _decodeDatetime
+    elif typeName in _nativeTypes:
+        decoder = _nativeTypes[typeName]
+    else:
+        # not a native type, must be model class
+        decoder = _compileModelDecoder(typeName, compiled)
+    compiled[typeName] = decoder
+    return decoder
+
+
+def _compileModelDecoder(typeName, compiled):
+    """Builds the decoder of a model class from its swaggerTypes"""
+    module = globals().get(typeName)
+    modelClass = getattr(module, typeName, None)
+    if modelClass is None:
+        raise TypeError('Unknown model class ' + typeName)
+    fields = []
+
+    def decodeModel(value):
+        instance = modelClass()
+        for attr, decode in fields:
+            if attr in value:
+                attrValue = value[attr]
+                if attrValue is not None:
+                    attrValue = decode(attrValue)
+                setattr(instance, attr, attrValue)
         return instance
 
+    # register before compiling the attributes, models can be recursive
+    compiled[typeName] = decodeModel
+    for attr, attrType in modelClass.swaggerTypes.iteritems():
+        fields.append((attr, _findDecoder(attrType, compiled)))
+    return decodeModel
+
+
+class Response(object):
+    """Response returned by a transport"""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+_idempotentMethods = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+
+class HTTPTransport(object):
+    """Transport reusing persistent (keep-alive) connections. At most
+    maxConnections connections are open per host at a time, idle connections
+    are closed after idleTimeout seconds. Socket operations give up after
+    timeout seconds (no timeout if None). Safe to share between threads."""
+
+    def __init__(self, maxConnections=4, idleTimeout=30, timeout=None):
+        self.maxConnections = maxConnections
+        self.idleTimeout = idleTimeout
+        self.timeout = timeout
+        self._idle = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers, data=None):
+        """Sends a request and returns a Response. Raises urllib2.HTTPError
+        for error statuses, like urllib2.urlopen does."""
+        parts = urlparse.urlsplit(url)
+        host = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path = path + '?' + parts.query
+
+        slot = self._slot(host)
+        slot.acquire()
+        try:
+            conn, reused = self._acquire(host)
+            try:
+                response = self._send(conn, method, path, headers, data)
+            except (httplib.HTTPException, socket.error):
+                conn.close()
+                # the server may have closed an idle connection, retry once
+                # with a fresh one. Other methods may have reached the server
+                # already, they are never sent twice.
+                if not reused or method not in _idempotentMethods:
+                    raise
+                conn = self._connect(host)
+                try:
+                    response = self._send(conn, method, path, headers, data)
+                except Exception:
+                    conn.close()
+                    raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(host, conn)
+        finally:
+            slot.release()
+
+        if response.status >= 400:
+            raise urllib2.HTTPError(url, response.status, response.reason,
+                                    response.msg, StringIO(response.body))
+        return Response(response.status, response.msg, response.body)
+
+    def close(self):
+        """Closes all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for _, conn in conns:
+                conn.close()
+
+    def _send(self, conn, method, path, headers, data):
+        """Sends the request on conn and reads the whole response"""
+        conn.request(method, path, data, headers)
+        response = conn.getresponse()
+        response.body = response.read()
+        return response
+
+    def _slot(self, host):
+        """Returns the semaphore bounding the connections to host"""
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(
+                    self.maxConnections)
+            return self._slots[host]
+
+    def _acquire(self, host):
+        """Returns (connection, reused), evicting expired idle connections"""
+        now = time.time()
+        with self._lock:
+            idle = self._idle.get(host, [])
+            expired = [conn for lastUsed, conn in idle
+                       if now - lastUsed > self.idleTimeout]
+            idle[:] = [(lastUsed, conn) for lastUsed, conn in idle
+                       if now - lastUsed <= self.idleTimeout]
+            conn = idle.pop()[1] if idle else None
+        for candidate in expired:
+            candidate.close()
+        if conn:
+            return conn, True
+        return self._connect(host), False
+
+    def _release(self, host, conn):
+        """Returns conn to the idle connections of host"""
+        with self._lock:
+            self._idle.setdefault(host, []).append((time.time(), conn))
+
+    def _connect(self, host):
+        scheme, netloc = host
+        if scheme == 'https':
+            return httplib.HTTPSConnection(netloc, timeout=self.timeout)
+        return httplib.HTTPConnection(netloc, timeout=self.timeout)
+
 
 class MethodRequest(urllib2.Request):
 
@@ -2,13 +2,23 @@
 
 """main.py - This file contains handlers that are called by taskqueue and/or
 cronjobs."""
+import json
 import logging
+import time
 
 import webapp2
 from google.appengine.api import mail, app_identity
 from api import HangmanApi
 
-from models import User, Game
+from google.appengine.api import taskqueue
+from google.appengine.ext import ndb
+from models import User, Game, Score, DEFAULT_WORD_LENGTH, LENGTH_MIN,\
+    LENGTH_MAX
+import counters
+import models
+
+MIGRATION_BATCH_SIZE = 50
+ROLLUP_BATCH_SIZE = 500
 
 
 class SendReminderEmail(webapp2.RequestHandler):
@@ -37,15 +47,263 @@ class SendReminderEmail(webapp2.RequestHandler):
                                body)
 
 
-class UpdateAverageMovesRemaining(webapp2.RequestHandler):
-    """ UpdateAverageMovesRemaining """
+class RollupUserCounters(webapp2.RequestHandler):
+    """ RollupUserCounters """
+    def get(self):
+        """Adds the games and wins counted in the sharded counters of the
+        users to their entity, so their score and the ranking are up to
+        date. Called every 5 minutes using a cron job"""
+        names = counters.pending_names(models.USER_COUNTERS,
+                                       ROLLUP_BATCH_SIZE)
+        keys = set(ndb.Key(urlsafe=name.split(':')[1]) for name in names)
+        for key in keys:
+            User.rollup_counters(key)
+        logging.info('Rolled up the counters of %d users', len(keys))
+
+
+class TrackActiveGames(webapp2.RequestHandler):
+    """ TrackActiveGames """
+    def post(self):
+        """Applies a change of the games in progress to their counters.
+        Enqueued with the transaction of the change."""
+        Game.apply_active(int(self.request.get('count')),
+                          int(self.request.get('attempts')))
+        self.response.set_status(204)
+
+
+class ReconcileAverageAttempts(webapp2.RequestHandler):
+    """ ReconcileAverageAttempts """
+    def get(self):
+        """Recounts the games in progress and their attempts remaining, and
+        corrects the counters behind the average. Called every hour using a
+        cron job"""
+        HangmanApi._reconcile_average_attempts()
+
+
+class RefillWordPool(webapp2.RequestHandler):
+    """ RefillWordPool """
+    def get(self):
+        """Refills the shared word pool of every length. Called by a cron
+        job, in case a refill task was missed."""
+        import game
+        for length in range(LENGTH_MIN, LENGTH_MAX + 1):
+            game.refill_shared_pool(length)
+
+    def post(self):
+        """Refills the shared word pool of the requested length. Enqueued
+        by the instances when the pool runs low."""
+        import game
+        game.refill_shared_pool(int(self.request.get('length')))
+        self.response.set_status(204)
+
+
+class MigrateMoves(webapp2.RequestHandler):
+    """ MigrateMoves """
+    def get(self):
+        """Starts the migration of the moves stored in the games to Move
+        entities. Only runs with MOVE_STORAGE set to 'entities', otherwise
+        the games would keep appending to their move log."""
+        if models.MOVE_STORAGE != 'entities':
+            self.response.set_status(409)
+            self.response.write('Set MOVE_STORAGE to entities first.')
+            return
+        taskqueue.add(url='/tasks/migrate_moves')
+        self.response.write('Migration started.')
+
     def post(self):
-        """Update game listing announcement in memcache."""
-        HangmanApi._cache_average_attempts()
+        """Migrates a batch of games, then enqueues the next batch"""
+        cursor = self.request.get('cursor')
+        start = ndb.Cursor(urlsafe=cursor) if cursor else None
+        keys, next_cursor, more = Game.query().fetch_page(
+            MIGRATION_BATCH_SIZE, start_cursor=start, keys_only=True)
+        migrated = sum(1 for key in keys if Game.migrate_moves(key))
+        logging.info('Migrated the moves of %d of %d games',
+                     migrated, len(keys))
+        if more and next_cursor:
+            taskqueue.add(url='/tasks/migrate_moves',
+                          params={'cursor': next_cursor.urlsafe()})
         self.response.set_status(204)
 
 
+class RekeyUsers(webapp2.RequestHandler):
+    """ RekeyUsers """
+    def get(self):
+        """Starts the re-keying of the users created with a numeric id"""
+        taskqueue.add(url='/tasks/rekey_users')
+        self.response.write('Re-keying started.')
+
+    def post(self):
+        """Re-keys a batch of users, then enqueues the next batch"""
+        cursor = self.request.get('cursor')
+        start = ndb.Cursor(urlsafe=cursor) if cursor else None
+        keys, next_cursor, more = User.query().fetch_page(
+            MIGRATION_BATCH_SIZE, start_cursor=start, keys_only=True)
+        rekeyed = 0
+        for key in keys:
+            if not key.string_id():
+                # a game ended after the re-keying finds its user by name
+                self.backfill_user_name(key)
+                rekeyed += 1 if User.rekey(key) else 0
+        logging.info('Re-keyed %d of %d users', rekeyed, len(keys))
+        if more and next_cursor:
+            taskqueue.add(url='/tasks/rekey_users',
+                          params={'cursor': next_cursor.urlsafe()})
+        self.response.set_status(204)
+
+    @staticmethod
+    def backfill_user_name(key):
+        """Copies the user name into the games and scores of the user of
+        key that have none (see BackfillUserNames)"""
+        user = key.get()
+        if not user:
+            return
+        for model in (Game, Score):
+            for entity in model.query(model.user == key):
+                if not entity.user_name:
+                    models.set_user_name(entity.key, user.name)
+
+
+class RekeyUserReferences(webapp2.RequestHandler):
+    """ RekeyUserReferences """
+    def post(self):
+        """Points the games and scores of a re-keyed user to its new key,
+        a batch at a time, the task is enqueued again until none is left"""
+        old_key = ndb.Key(urlsafe=self.request.get('old'))
+        new_key = ndb.Key(urlsafe=self.request.get('new'))
+        keys = []
+        for model in (Game, Score):
+            keys.extend(model.query(model.user == old_key).fetch(
+                MIGRATION_BATCH_SIZE, keys_only=True))
+        # one transaction per entity, the games may be played meanwhile
+        for key in keys:
+            models.set_user_key(key, old_key, new_key)
+        if keys:
+            taskqueue.add(url='/tasks/rekey_user_references',
+                          params={'old': old_key.urlsafe(),
+                                  'new': new_key.urlsafe()})
+        self.response.set_status(204)
+
+
+class BackfillUserNames(webapp2.RequestHandler):
+    """ BackfillUserNames """
+    KINDS = {'Game': Game, 'Score': Score}
+
+    def get(self):
+        """Starts the copy of the user names into the existing games and
+        scores"""
+        for kind in self.KINDS:
+            taskqueue.add(url='/tasks/backfill_user_names',
+                          params={'kind': kind})
+        self.response.write('Backfill started.')
+
+    def post(self):
+        """Copies the user names into a batch of entities of the requested
+        kind, then enqueues the next batch"""
+        kind = self.request.get('kind')
+        cursor = self.request.get('cursor')
+        start = ndb.Cursor(urlsafe=cursor) if cursor else None
+        entities, next_cursor, more = self.KINDS[kind].query().fetch_page(
+            MIGRATION_BATCH_SIZE, start_cursor=start)
+        missing = [entity for entity in entities if not entity.user_name]
+        users = ndb.get_multi([entity.user for entity in missing])
+        # the entities are updated one at a time in a transaction, the
+        # games may be played meanwhile
+        updated = sum(1 for entity, user in zip(missing, users)
+                      if user and models.set_user_name(entity.key, user.name))
+        logging.info('Backfilled the user name of %d of %d %s entities',
+                     updated, len(entities), kind)
+        if more and next_cursor:
+            taskqueue.add(url='/tasks/backfill_user_names',
+                          params={'kind': kind,
+                                  'cursor': next_cursor.urlsafe()})
+        self.response.set_status(204)
+
+
+class Warmup(webapp2.RequestHandler):
+    """ Warmup requests are sent by App Engine before a new instance receives
+    live traffic """
+    def get(self):
+        """Loads the word sources and fills the word pools of the default
+        length and of the other lengths played lately (words claimed by an
+        instance are lost when it shuts down). Responds with the seconds
+        taken by each step."""
+        report = []
+
+        def step(name, fn, *args):
+            start = time.time()
+            try:
+                fn(*args)
+            except Exception:
+                logging.exception('Warmup step %s failed', name)
+            report.append((name, round(time.time() - start, 3)))
+
+        def load_word_source():
+            import game
+            if game.WORD_SOURCE == 'dictionary':
+                game.get_dictionary()
+            else:
+                # builds the client only, requests go through urlfetch and
+                # there is no connection to open ahead of time
+                game.get_client()
+
+        def fill_default_length():
+            import game
+            if game.WORD_SOURCE != 'dictionary':
+                game.pool.refill(DEFAULT_WORD_LENGTH)
+
+        def fill_played_lengths():
+            import game
+            if game.WORD_SOURCE != 'dictionary':
+                lengths = game.played_lengths(
+                    [length for length in range(LENGTH_MIN, LENGTH_MAX + 1)
+                     if length != DEFAULT_WORD_LENGTH])
+                if lengths:
+                    game.refill_pools(lengths)
+
+        step('load_word_source', load_word_source)
+        step('fill_default_length', fill_default_length)
+        step('fill_played_lengths', fill_played_lengths)
+        logging.info('Warmup: %s', ', '.join('{} {}s'.format(name, seconds)
+                                             for name, seconds in report))
+        self.response.headers['Content-Type'] = 'application/json'
+        self.response.write(json.dumps(report))
+
+
+class WordSourceMetrics(webapp2.RequestHandler):
+    """ WordSourceMetrics """
+    def get(self):
+        """Publishes the demand rate and level of the word pool of every
+        length, and the Wordnik statistics, of the instance serving it."""
+        import game
+        metrics = game.get_metrics()
+        logging.info('Word source metrics: %s', metrics)
+        self.response.headers['Content-Type'] = 'application/json'
+        self.response.write(json.dumps(metrics))
+
+
+class EntityCacheMetrics(webapp2.RequestHandler):
+    """ EntityCacheMetrics """
+    def get(self):
+        """Publishes the reads of every cached kind served by the local
+        cache, memcache and the Datastore on the instance serving it."""
+        import entity_cache
+        stats = entity_cache.get_stats()
+        logging.info('Entity cache metrics: %s', stats)
+        self.response.headers['Content-Type'] = 'application/json'
+        self.response.write(json.dumps(stats))
+
+
 app = webapp2.WSGIApplication([
     ('/crons/send_reminder', SendReminderEmail),
-    ('/tasks/cache_average_attempts', UpdateAverageMovesRemaining),
+    ('/crons/rollup_user_counters', RollupUserCounters),
+    ('/crons/reconcile_average_attempts', ReconcileAverageAttempts),
+    ('/tasks/refill_word_pool', RefillWordPool),
+    ('/tasks/track_active_games', TrackActiveGames),
+    ('/tasks/migrate_moves', MigrateMoves),
+    ('/tasks/backfill_user_names', BackfillUserNames),
+    ('/tasks/rekey_users', RekeyUsers),
+    ('/tasks/rekey_user_references', RekeyUserReferences),
+    ('/_ah/warmup', Warmup),
+    ('/admin/word_source_metrics', WordSourceMetrics),
+    ('/admin/entity_cache_metrics', EntityCacheMetrics),
 ], debug=True)
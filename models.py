@@ -2,11 +2,19 @@
 entities used by the Game. Because these classes are also regular Python
 classes they can include methods (such as 'to_form' and 'new_game')."""
 
+import logging
+import os
+import random
+import struct
 from datetime import date
 from protorpc import messages
+from google.appengine.api import datastore_errors
+from google.appengine.api import memcache
 from google.appengine.ext import ndb
-from game import get_target
+from engine import HangmanEngine
 from utils import get_by_urlsafe
+import counters
+import entity_cache
 
 DEFAULT_WORD_LENGTH = 7
 DEFAULT_ATTEMPT_ERRORS = 5
@@ -14,6 +22,30 @@ ATTEMPTS_MIN = 3
 ATTEMPTS_MAX = 10
 LENGTH_MIN = 5
 LENGTH_MAX = 10
+# shared word pool: words per WordBatch, shards of each length (an entity
+# group takes about one claim per second), batches kept available per shard
+# and level of a shard under which a refill task is enqueued
+WORD_BATCH_SIZE = 20
+WORD_POOL_SHARDS = 5
+WORD_POOL_BATCHES = 4
+WORD_POOL_LOW_WATER = 1
+# where new moves are stored: 'log' (Game.move_log) or 'entities' (Move
+# children of the Game, the Game keeps a constant size)
+MOVE_STORAGE = os.environ.get('MOVE_STORAGE', 'log')
+# group of the sharded counters of the users
+USER_COUNTERS = 'user'
+# the two users and the two counters of a re-keying fit in the 25 entity
+# groups of a cross-group transaction up to this many counter shards
+REKEY_MAX_SHARDS = 11
+# sharded counters of the games in progress (not over nor cancelled) and
+# the sum of their attempts remaining
+ACTIVE_GAMES_COUNT = 'games:active_count'
+ACTIVE_GAMES_ATTEMPTS = 'games:active_attempts'
+ACTIVE_GAMES_SHARDS = 10
+# queue of the tasks updating them (see queue.yaml)
+ACTIVE_GAMES_QUEUE = 'active-games'
+# drift of the counters seen by the last reconciliation, in memcache
+ACTIVE_GAMES_DRIFT = 'games:active_drift'
 
 def get_score(self):
     """ Calculate user score """
@@ -23,12 +55,110 @@ def get_score(self):
     return score
 
 class User(ndb.Model):
-    """User profile"""
+    """User profile, the key id is the user name (users created before have
+    a numeric id until they are re-keyed, see rekey). New games and wins
+    are counted in sharded counters and added to wins and total_games by
+    rollup_counters."""
     name = ndb.StringProperty(required=True)
     email = ndb.StringProperty()
     wins = ndb.IntegerProperty(required=True, default=0)
     total_games = ndb.IntegerProperty(required=True, default=0)
     score = ndb.ComputedProperty(get_score)
+    # shards of the counters of the user, more for users playing many games
+    # in parallel (at most counters.MAX_SHARDS, never decreased)
+    counter_shards = ndb.IntegerProperty(default=counters.SHARDS,
+                                         indexed=False)
+
+    def _post_put_hook(self, future):
+        entity_cache.invalidate(self.key)
+
+    @classmethod
+    def _post_delete_hook(cls, key, future):
+        entity_cache.invalidate(key)
+
+    @classmethod
+    def get_by_name(cls, name):
+        """Returns the user with the given name or None, a key lookup served
+        from the entity cache (a query for the users not re-keyed yet)"""
+        return entity_cache.get(ndb.Key(cls, name)) or \
+            cls.query(cls.name == name).get()
+
+    @classmethod
+    def create(cls, name, email=None):
+        """Creates the user with the given name, atomically: returns None if
+        the name is already taken"""
+        if cls.query(cls.name == name).get(keys_only=True):
+            return None
+        return cls._insert(name, email)
+
+    @classmethod
+    @ndb.transactional
+    def _insert(cls, name, email):
+        if cls.get_by_id(name):
+            return None
+        user = cls(id=name, name=name, email=email)
+        user.put()
+        return user
+
+    @staticmethod
+    def counter_name(key, field):
+        """Returns the name of the sharded counter of field of the user"""
+        return '{}:{}:{}'.format(USER_COUNTERS, key.urlsafe(), field)
+
+    @classmethod
+    @ndb.transactional(xg=True)
+    def rollup_counters(cls, key):
+        """Adds the games and wins counted in the sharded counters of the
+        user to total_games and wins. Returns False if there is no user, the
+        counts of a deleted user are dropped so its shards aren't left
+        pending."""
+        user = key.get()
+        shards = user.counter_shards if user else counters.MAX_SHARDS
+        wins = counters.take(cls.counter_name(key, 'wins'), shards)
+        total_games = counters.take(cls.counter_name(key, 'total_games'),
+                                    shards)
+        if not user:
+            return False
+        user.wins += wins
+        user.total_games += total_games
+        user.put()
+        return True
+
+    @classmethod
+    @ndb.transactional(xg=True)
+    def rekey(cls, old_key):
+        """Moves a user with a numeric id to the key of its name, merged into
+        the user already there if any (duplicate names created by
+        concurrent signups), with the counts of its sharded counters, and
+        enqueues the task rewriting the references of its games and scores.
+        Returns the new key or None."""
+        from google.appengine.api import taskqueue
+        user = old_key.get()
+        if not user or old_key.string_id():
+            return None
+        if user.counter_shards > REKEY_MAX_SHARDS:
+            logging.warning('User %s not re-keyed, it has %d counter shards',
+                            user.name, user.counter_shards)
+            return None
+        # the counters are named after the old key
+        user.wins += counters.take(cls.counter_name(old_key, 'wins'),
+                                   user.counter_shards)
+        user.total_games += counters.take(
+            cls.counter_name(old_key, 'total_games'), user.counter_shards)
+        target = cls.get_by_id(user.name)
+        if target:
+            target.wins += user.wins
+            target.total_games += user.total_games
+            target.email = target.email or user.email
+        else:
+            target = cls(id=user.name, name=user.name, email=user.email,
+                         wins=user.wins, total_games=user.total_games)
+        target.put()
+        old_key.delete()
+        taskqueue.add(url='/tasks/rekey_user_references', transactional=True,
+                      params={'old': old_key.urlsafe(),
+                              'new': target.key.urlsafe()})
+        return target.key
 
     def to_rank_form(self):
         """Returns a UserRankForm representation of the User"""
@@ -46,77 +176,444 @@ class Game(ndb.Model):
     attempts_remaining = ndb.IntegerProperty(required=True, default=DEFAULT_ATTEMPT_ERRORS)
     game_over = ndb.BooleanProperty(required=True, default=False)
     user = ndb.KeyProperty(required=True, kind='User')
+    # copy of the user name, so forms are built without fetching the user
+    user_name = ndb.StringProperty(indexed=False)
     cancelled = ndb.BooleanProperty(required=True, default=False)
+    # snapshots of the moves of games played before move_log existed
     moves = ndb.JsonProperty(repeated=True)
+    # append-only log of the moves: the guess as sent and its outcome, the
+    # game states of the history are rebuilt from it (see history)
+    move_log = ndb.BlobProperty(default='')
+    # number of moves stored as Move entities
+    move_count = ndb.IntegerProperty(default=0, indexed=False)
+    # incremented by every update, moves can require the version they saw
+    version = ndb.IntegerProperty(required=True, default=0)
+
+    def _post_put_hook(self, future):
+        entity_cache.invalidate(self.key)
+
+    @classmethod
+    def _post_delete_hook(cls, key, future):
+        entity_cache.invalidate(key)
 
     @classmethod
     def new_game(cls, user, length, attempts):
-        """Creates and returns a new game"""
+        """Creates and returns a new game of the User entity user"""
         if (attempts < ATTEMPTS_MIN) or (attempts > ATTEMPTS_MAX):
             raise ValueError('Attempts value error!')
         elif (length < LENGTH_MIN) or (length > LENGTH_MAX):
             raise ValueError('Length value error!')
-        game = Game(user=user,
+        # imported here, only instances creating games load the word sources
+        from game import get_target
+        game = Game(user=user.key,
+                    user_name=user.name,
                     target=get_target(length),
                     status_word='*'*length,
                     status_fails=[],
                     attempts_allowed=attempts,
                     attempts_remaining=attempts,
                     game_over=False,
-                    cancelled=False,
-                    moves=[])
+                    cancelled=False)
         game.put()
+        Game.track_active(1, attempts)
         # Update user total_games
         # we count also cancelled games for total_games
-        user = user.get()
-        user.total_games += 1
-        user.put()
+        counters.increment(User.counter_name(user.key, 'total_games'), 1,
+                           user.counter_shards)
         return game
 
-    def to_form(self, *args):
-        """Returns a GameForm representation of the Game"""
+    @staticmethod
+    def track_active(count, attempts):
+        """Adds count games and attempts remaining to the counters of the
+        games in progress. The counters are shared by every game, they are
+        updated by a task enqueued with the current transaction (if any), so
+        the moves of unrelated games never write the same entities."""
+        from google.appengine.api import taskqueue
+        taskqueue.add(url='/tasks/track_active_games',
+                      params={'count': count, 'attempts': attempts},
+                      queue_name=ACTIVE_GAMES_QUEUE,
+                      transactional=ndb.in_transaction())
+
+    @staticmethod
+    def _active_tasks():
+        """Returns the number of tasks of track_active not run yet"""
+        from google.appengine.api import taskqueue
+        return taskqueue.QueueStatistics.fetch(
+            taskqueue.Queue(ACTIVE_GAMES_QUEUE)).tasks
+
+    @staticmethod
+    @ndb.transactional(xg=True)
+    def apply_active(count, attempts):
+        """Adds count games and attempts remaining to the counters of the
+        games in progress, run by the task of track_active"""
+        futures = []
+        if count:
+            futures.append(counters.increment_async(
+                ACTIVE_GAMES_COUNT, count, ACTIVE_GAMES_SHARDS))
+        if attempts:
+            futures.append(counters.increment_async(
+                ACTIVE_GAMES_ATTEMPTS, attempts, ACTIVE_GAMES_SHARDS))
+        for future in futures:
+            future.check_success()
+
+    @staticmethod
+    def average_attempts():
+        """Returns the average attempts remaining of the games in progress,
+        None if there is none"""
+        count = counters.get_count(ACTIVE_GAMES_COUNT, ACTIVE_GAMES_SHARDS)
+        if count <= 0:
+            return None
+        return float(counters.get_count(ACTIVE_GAMES_ATTEMPTS,
+                                        ACTIVE_GAMES_SHARDS)) / count
+
+    @staticmethod
+    def reconcile_active():
+        """Recounts the games in progress and their attempts remaining and
+        corrects the drift of the counters (updates lost to failures). The
+        counters lag behind by the queued tasks, nothing is corrected while
+        the queue of track_active has tasks (they can't be told from lost
+        updates). The counters also move during the scan, so only the drift
+        seen before and after the scan, and by the last reconciliation too,
+        is corrected (the smallest of them). Returns the (count, attempts)
+        corrections."""
+        if Game._active_tasks():
+            logging.info('Reconciliation skipped, active games tasks queued')
+            return 0, 0
+        names = (ACTIVE_GAMES_COUNT, ACTIVE_GAMES_ATTEMPTS)
+        before = [counters.sum_shards(name, ACTIVE_GAMES_SHARDS)
+                  for name in names]
+        scanned = [0, 0]
+        for game in Game.query(Game.game_over == False,
+                               Game.cancelled == False).iter(batch_size=500):
+            scanned[0] += 1
+            scanned[1] += game.attempts_remaining
+        after = [counters.sum_shards(name, ACTIVE_GAMES_SHARDS)
+                 for name in names]
+        if Game._active_tasks():
+            logging.info('Reconciliation skipped, active games tasks queued')
+            return 0, 0
+        drift = [_common_drift(total - first, total - last)
+                 for total, first, last in zip(scanned, before, after)]
+        previous = memcache.get(ACTIVE_GAMES_DRIFT) or [None, None]
+        corrections = [_common_drift(old, new)
+                       for old, new in zip(previous, drift)]
+        # the next run only sees the drift left after the corrections
+        memcache.set(ACTIVE_GAMES_DRIFT,
+                     [new - fix for new, fix in zip(drift, corrections)])
+        if any(corrections):
+            Game.apply_active(*corrections)
+        return tuple(corrections)
+
+    def to_form(self, message=None, user=None):
+        """Returns a GameForm representation of the Game, user is the User
+        of the game if it has already been fetched"""
         form = GameForm()
         form.urlsafe_key = self.key.urlsafe()
-        form.user_name = self.user.get().name
+        form.user_name = self.user_name or (user or self.user.get()).name
         form.attempts_remaining = self.attempts_remaining
         form.game_over = self.game_over
         form.cancelled = self.cancelled
-        if args:
-            form.message = args[0]
+        form.message = message
         form.status_word = self.status_word
         form.status_fails = self.status_fails
+        form.version = self.version
         return form
 
-    def end_game(self, won=False):
+    def add_move(self, guess, success, engine):
+        """Stores a move, with the game state after it in engine. In 'log'
+        storage it is appended to the move log: a flags byte (success), the
+        length of the guess and the guess as sent, UTF-8 encoded. In
+        'entities' storage returns the Move entity to put."""
+        if MOVE_STORAGE == 'entities':
+            self.move_count += 1
+            number = len(self.moves) + len(self.logged_moves()) + \
+                self.move_count
+            return Move(parent=self.key, id=number, guess=guess.lower(),
+                        success=success,
+                        attempts_remaining=engine.attempts_remaining,
+                        result_status=engine.status_word,
+                        result_fails=engine.status_fails)
+        data = guess.encode('utf-8')
+        self.move_log += struct.pack('BB', int(success), len(data)) + data
+
+    def logged_moves(self):
+        """Returns the (guess, success) pairs of the move log"""
+        moves = []
+        offset = 0
+        while offset < len(self.move_log):
+            flags, size = struct.unpack_from('BB', self.move_log, offset)
+            offset += 2
+            guess = self.move_log[offset:offset + size].decode('utf-8')
+            offset += size
+            moves.append((guess, bool(flags & 1)))
+        return moves
+
+    def stored_history(self):
+        """Returns the MoveForm of the moves stored in the Game entity. The
+        states of the logged moves are rebuilt by replaying their guesses
+        from the initial state (or from the last move stored as a snapshot,
+        for games played before the move log)."""
+        forms = [MoveForm(**move) for move in self.moves]
+        if forms:
+            last = self.moves[-1]
+            engine = HangmanEngine(self.target, last['result_status'],
+                                   last['result_fails'],
+                                   last['attempts_remaining'])
+        else:
+            engine = HangmanEngine(self.target, '*' * len(self.target), [],
+                                   self.attempts_allowed)
+        for guess, success in self.logged_moves():
+            result = engine.guess(guess)
+            forms.append(MoveForm(guess=result.guess, success=success,
+                                  attempts_remaining=engine.attempts_remaining,
+                                  result_status=engine.status_word,
+                                  result_fails=engine.status_fails))
+        return forms
+
+    def history(self):
+        """Returns the MoveForm of every move, with the game state after it"""
+        forms = self.stored_history()
+        if self.move_count:
+            query = Move.query(ancestor=self.key).order(Move.key)
+            forms.extend(move.to_form() for move in query)
+        return forms
+
+    def history_page(self, page_size, cursor=None):
+        """Returns a page of the history: (list of MoveForm, cursor of the
+        next page or None). Moves stored in the Game come first ('s'
+        cursors are offsets in them), then the Move entities, read with an
+        ancestor query ('e' cursors are query cursors). Raises ValueError
+        if page_size isn't positive or cursor wasn't returned by it."""
+        if page_size < 1:
+            raise ValueError('Page size value error!')
+        forms = []
+        if not cursor or cursor.startswith('s'):
+            if cursor and not cursor[1:].isdigit():
+                raise ValueError('Cursor value error!')
+            offset = int(cursor[1:]) if cursor else 0
+            stored = self.stored_history()
+            forms = stored[offset:offset + page_size]
+            if offset + page_size < len(stored):
+                return forms, 's{}'.format(offset + page_size)
+            start = None
+        elif cursor.startswith('e'):
+            try:
+                start = ndb.Cursor(urlsafe=cursor[1:]) if cursor[1:] else None
+            except datastore_errors.BadValueError:
+                raise ValueError('Cursor value error!')
+        else:
+            raise ValueError('Cursor value error!')
+        if not self.move_count:
+            return forms, None
+        if len(forms) == page_size:
+            return forms, 'e'
+        query = Move.query(ancestor=self.key).order(Move.key)
+        try:
+            moves, next_cursor, more = query.fetch_page(
+                page_size - len(forms), start_cursor=start)
+        except datastore_errors.BadRequestError:
+            # a cursor that decodes but isn't one of this query
+            raise ValueError('Cursor value error!')
+        forms.extend(move.to_form() for move in moves)
+        if more and next_cursor:
+            return forms, 'e' + next_cursor.urlsafe()
+        return forms, None
+
+    @classmethod
+    @ndb.transactional
+    def migrate_moves(cls, key):
+        """Moves the history stored in the Game entity (snapshots and move
+        log) to Move entities. Returns True if the game had moves to
+        convert."""
+        game = key.get()
+        forms = game.stored_history() if game else []
+        if not forms:
+            return False
+        moves = [Move(parent=key, id=number, guess=form.guess,
+                      success=form.success,
+                      attempts_remaining=form.attempts_remaining,
+                      result_status=form.result_status,
+                      result_fails=list(form.result_fails))
+                 for number, form in enumerate(forms, 1)]
+        game.move_count += len(moves)
+        game.moves = []
+        game.move_log = ''
+        ndb.put_multi(moves + [game])
+        return True
+
+    def end_game(self, won=False, user_future=None, entities=()):
         """Ends the game - if won is True, the player won. - if won is False,
-        the player lost."""
+        the player lost. The Game, its Score, the wins counter of the User
+        and the other entities given are written in a single batch, call it
+        in a cross-group transaction so they are all written or none.
+        Args:
+            user_future: the get_async of the user of the game, if the fetch
+                has already been started.
+            entities: other entities to write with the game (e.g. Moves)."""
+        if user_future is None:
+            user_future = self.user.get_async()
         self.game_over = True
-        self.put()
-        # Add the game to the score 'board'
-        score = Score(user=self.user, date=date.today(), won=won,
+        user = None
+        if not (self.user_name and self.user.string_id()):
+            # a numeric key may have been re-keyed since the game started,
+            # the user is read first to write the game with its new key
+            user = user_future.get_result()
+            if user is None and self.user_name:
+                user = User.get_by_id(self.user_name)
+                self.user = user.key
+            self.user_name = user.name
+        # Add the game to the score 'board', written while the user is read
+        score = Score(user=self.user, user_name=self.user_name,
+                      date=date.today(), won=won,
                       errors=self.attempts_allowed - self.attempts_remaining,
                       length=len(self.target))
-        score.put()
-        # Update user score
-        user = self.user.get()
+        futures = ndb.put_multi_async([self, score] + list(entities))
+        # Update user score, the user is only needed for its counter shards
         if won:
-            user.wins += 1
-        user.put()
+            user = user or user_future.get_result()
+            futures.append(counters.increment_async(
+                User.counter_name(self.user, 'wins'), 1, user.counter_shards))
+        # every write must have succeeded, an error aborts the transaction
+        for future in futures:
+            future.check_success()
+
+class Move(ndb.Model):
+    """Move of a game, child of the Game, the key id is the move number"""
+    guess = ndb.StringProperty(required=True, indexed=False)
+    success = ndb.BooleanProperty(required=True, indexed=False)
+    attempts_remaining = ndb.IntegerProperty(required=True, indexed=False)
+    result_status = ndb.StringProperty(required=True, indexed=False)
+    result_fails = ndb.StringProperty(repeated=True, indexed=False)
+
+    def to_form(self):
+        """Returns a MoveForm representation of the Move"""
+        return MoveForm(guess=self.guess, success=self.success,
+                        attempts_remaining=self.attempts_remaining,
+                        result_status=self.result_status,
+                        result_fails=self.result_fails)
 
 class Score(ndb.Model):
     """Score object"""
     user = ndb.KeyProperty(required=True, kind='User')
+    # copy of the user name, so forms are built without fetching the user
+    user_name = ndb.StringProperty(indexed=False)
     date = ndb.DateProperty(required=True)
     won = ndb.BooleanProperty(required=True)
     errors = ndb.IntegerProperty(required=True)
     length = ndb.IntegerProperty(required=True)
 
-    def to_form(self):
-        """ Score form """
-        return ScoreForm(user_name=self.user.get().name, won=self.won,
+    def to_form(self, user=None):
+        """ Score form, user is the User of the score if it has already been
+        fetched """
+        return ScoreForm(user_name=self.user_name or
+                         (user or self.user.get()).name,
+                         won=self.won,
                          date=str(self.date), errors=self.errors,
                          length=self.length)
 
+def _common_drift(first, second):
+    """Returns the part of a drift seen by two measures: the smallest one if
+    they agree on its sign, otherwise 0"""
+    if first is None or second is None or first * second <= 0:
+        return 0
+    return min(first, second) if first > 0 else max(first, second)
+
+@ndb.transactional
+def set_user_name(key, user_name):
+    """Copies the user name into the Game or Score of key if it has none.
+    The entity is read again in the transaction, a concurrent update of the
+    game is not overwritten. Returns True if the entity was updated."""
+    entity = key.get()
+    if not entity or entity.user_name:
+        return False
+    entity.user_name = user_name
+    entity.put()
+    return True
+
+@ndb.transactional
+def set_user_key(key, old_user, new_user):
+    """Points the Game or Score of key from the user old_user to new_user,
+    in a transaction so a concurrent update of the game is not overwritten.
+    Returns True if the entity was updated."""
+    entity = key.get()
+    if not entity or entity.user != old_user:
+        return False
+    entity.user = new_user
+    entity.put()
+    return True
+
+class WordPoolShard(ndb.Model):
+    """Part of the shared pool of target words of one length, used by all the
+    instances. Each length is spread over WORD_POOL_SHARDS shards, the key
+    id is 'length-index'. Words are stored in WordBatch children numbered
+    from 1, batches up to 'claimed' have already been handed out to an
+    instance."""
+    filled = ndb.IntegerProperty(required=True, default=0, indexed=False)
+    claimed = ndb.IntegerProperty(required=True, default=0, indexed=False)
+
+    @classmethod
+    def shard_keys(cls, length):
+        """Returns the keys of the shards of the given length"""
+        return [ndb.Key(cls, '{}-{}'.format(length, index))
+                for index in range(WORD_POOL_SHARDS)]
+
+    @classmethod
+    def claim(cls, length):
+        """Claims the next batch of words of the given length from a random
+        shard (another one if it is empty). Returns (list of words, empty if
+        the pool is empty, batches left in the shard)"""
+        keys = random.sample(cls.shard_keys(length), min(2, WORD_POOL_SHARDS))
+        for key in keys:
+            words, left = cls._claim(key)
+            if words:
+                break
+        return words, left
+
+    @classmethod
+    @ndb.transactional
+    def _claim(cls, key):
+        """Atomically claims the next batch of words of the shard"""
+        shard = key.get()
+        if not shard or shard.claimed >= shard.filled:
+            return [], 0
+        shard.claimed += 1
+        shard.put()
+        batch = WordBatch.get_by_id(shard.claimed, parent=shard.key)
+        return batch.words, shard.filled - shard.claimed
+
+    @classmethod
+    @ndb.transactional
+    def add_batch(cls, key, words):
+        """Appends a batch of words to the shard of key, returns the batches
+        available in it"""
+        shard = key.get() or cls(key=key)
+        shard.filled += 1
+        batch = WordBatch(parent=shard.key, id=shard.filled, words=words)
+        ndb.put_multi([shard, batch])
+        return shard.filled - shard.claimed
+
+    @classmethod
+    def available(cls, length):
+        """Returns the batches available in each shard of the given length,
+        by shard key"""
+        keys = cls.shard_keys(length)
+        return dict((key, shard.filled - shard.claimed if shard else 0)
+                    for key, shard in zip(keys, ndb.get_multi(keys)))
+
+    @classmethod
+    def prune(cls, length):
+        """Deletes the batches already claimed"""
+        for shard in ndb.get_multi(cls.shard_keys(length)):
+            if shard and shard.claimed:
+                last = ndb.Key(WordBatch, shard.claimed, parent=shard.key)
+                keys = WordBatch.query(ancestor=shard.key).filter(
+                    WordBatch.key <= last).fetch(keys_only=True)
+                ndb.delete_multi(keys)
+
+class WordBatch(ndb.Model):
+    """Batch of words of a WordPoolShard, claimed at once by an instance"""
+    words = ndb.StringProperty(repeated=True, indexed=False)
+
 class GameForm(messages.Message):
     """GameForm for outbound game state information"""
     urlsafe_key = messages.StringField(1, required=True)
@@ -127,6 +624,7 @@ class GameForm(messages.Message):
     status_word = messages.StringField(6, required=True)
     status_fails = messages.StringField(7, repeated=True)
     cancelled = messages.BooleanField(8, required=True)
+    version = messages.IntegerField(9)
 
 class NewGameForm(messages.Message):
     """Used to create a new game"""
@@ -137,6 +635,19 @@ class NewGameForm(messages.Message):
 class MakeMoveForm(messages.Message):
     """Used to make a move in an existing game"""
     guess = messages.StringField(1, required=True)
+    version = messages.IntegerField(2)
+
+class MakeMovesForm(messages.Message):
+    """Used to make several moves in an existing game"""
+    guesses = messages.StringField(1, repeated=True)
+    version = messages.IntegerField(2)
+
+class MoveResultForm(messages.Message):
+    """Result of one of several moves"""
+    guess = messages.StringField(1, required=True)
+    success = messages.BooleanField(2, required=True)
+    message = messages.StringField(3, required=True)
+    illegal = messages.BooleanField(4, required=True)
 
 # New move form (used for game history form)
 class MoveForm(messages.Message):
@@ -154,6 +665,12 @@ class GameHistoryForm(messages.Message):
     game_over = messages.BooleanField(2, required=True)
     game_cancelled = messages.BooleanField(3, required=True)
     moves = messages.MessageField(MoveForm, 4, repeated=True)
+    next_cursor = messages.StringField(5)
+
+class MovesForm(messages.Message):
+    """ Used to return the results of several moves and the final game """
+    results = messages.MessageField(MoveResultForm, 1, repeated=True)
+    game = messages.MessageField(GameForm, 2, required=True)
 
 # New Games User Form
 class GamesForm(messages.Message):
@@ -3,12 +3,14 @@
 import logging
 from google.appengine.ext import ndb
 import endpoints
+import entity_cache
 
 def get_by_urlsafe(urlsafe, model):
     """Returns an ndb.Model entity that the urlsafe key points to. Checks
         that the type of entity returned is of the correct kind. Raises an
         error if the key String is malformed or the entity is of the incorrect
-        kind
+        kind. Outside transactions the entity is read through the entity
+        cache (see entity_cache.py)
     Args:
         urlsafe: A urlsafe key string
         model: The expected entity kind
@@ -27,9 +29,34 @@ def get_by_urlsafe(urlsafe, model):
         else:
             raise
 
-    entity = key.get()
+    if ndb.in_transaction():
+        entity = key.get()
+    else:
+        entity = entity_cache.get(key)
     if not entity:
         return None
     if not isinstance(entity, model):
         raise ValueError('Incorrect Kind')
     return entity
+
+
+def get_references(entities, *properties):
+    """Fetches the entities referenced by KeyProperty properties of a list of
+    entities with a single ndb.get_multi, instead of one get per entity.
+    Args:
+        entities: the entities holding the references, e.g. a page of Scores.
+        properties: names of their KeyProperty, e.g. 'user'.
+    Returns:
+        A dict of the referenced entities by key (missing entities are
+        left out)."""
+    keys = set()
+    for entity in entities:
+        for name in properties:
+            value = getattr(entity, name)
+            if isinstance(value, list):
+                keys.update(value)
+            elif value is not None:
+                keys.add(value)
+    keys = list(keys)
+    return dict((key, entity) for key, entity
+                in zip(keys, ndb.get_multi(keys)) if entity)
@@ -0,0 +1,121 @@
+"""wordnik_batch.py - Concurrent facade over the Wordnik WordsApi and WordApi.
+Many requests are executed in parallel on a bounded pool of worker threads,
+so a batch of lookups takes as long as its slowest call instead of the sum of
+all of them."""
+
+import Queue
+import logging
+import sys
+import threading
+
+from wordnik import WordsApi, WordApi
+
+MAX_WORKERS = 6
+
+
+class Future(object):
+    """Result of a call running in a WorkerPool"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+
+    def done(self):
+        """Returns True if the call has finished"""
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Waits for the call and returns its result, or raises its error.
+        Raises:
+            RuntimeError: if the call did not finish within timeout seconds."""
+        if not self._done.wait(timeout):
+            raise RuntimeError('Call did not finish in time')
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def set_result(self, result):
+        self._result = result
+        self._done.set()
+
+    def set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._done.set()
+
+
+class WorkerPool(object):
+    """Bounded pool of worker threads. Workers are started by submit and
+    exit as soon as the queue is empty: the App Engine runtime waits for the
+    threads of a request before responding, so none may outlive its work."""
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._queue = Queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules fn(*args, **kwargs) and returns its Future"""
+        future = Future()
+        with self._lock:
+            self._queue.put((future, fn, args, kwargs))
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work)
+                worker.daemon = True
+                self._workers.append(worker)
+                worker.start()
+        return future
+
+    def map(self, fn, items, timeout=None):
+        """Calls fn for every item in parallel, returns the ordered results"""
+        futures = [self.submit(fn, item) for item in items]
+        return [future.result(timeout) for future in futures]
+
+    def _work(self):
+        while True:
+            # checked with the lock held, a submit either sees this worker
+            # still running or starts a new one
+            with self._lock:
+                try:
+                    future, fn, args, kwargs = self._queue.get_nowait()
+                except Queue.Empty:
+                    self._workers.remove(threading.current_thread())
+                    return
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception:
+                logging.debug('Concurrent call failed', exc_info=True)
+                future.set_exc_info(sys.exc_info())
+
+
+class ConcurrentWordnik(object):
+    """Runs WordsApi and WordApi calls concurrently. Works with any
+    swagger.ApiClient, e.g. one pointing to a local stub server.
+    Args:
+        client: the swagger.ApiClient used for every call.
+        max_workers: maximum number of calls running at the same time."""
+
+    def __init__(self, client, max_workers=MAX_WORKERS):
+        self.wordsApi = WordsApi.WordsApi(client)
+        self.wordApi = WordApi.WordApi(client)
+        self.pool = WorkerPool(max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules any call and returns its Future"""
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def random_words(self, lengths, timeout=None, **params):
+        """Returns the getRandomWords result for every length, in the same
+        order. params are passed to every getRandomWords call."""
+        def fetch(length):
+            return self.wordsApi.getRandomWords(minLength=length,
+                                                maxLength=length, **params)
+        return self.pool.map(fetch, lengths, timeout)
+
+    def definitions(self, words, timeout=None, **params):
+        """Returns the getDefinitions result for every word, in the same
+        order. params are passed to every getDefinitions call."""
+        def fetch(word):
+            return self.wordApi.getDefinitions(word, **params)
+        return self.pool.map(fetch, words, timeout)
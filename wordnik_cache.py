@@ -0,0 +1,152 @@
+"""wordnik_cache.py - Persistent cache of Wordnik GET responses, used by
+swagger.ApiClient.callAPI. Responses are keyed by resource path plus the
+sorted query parameters and kept for a time that depends on the endpoint:
+the data of a word (definitions, hyphenation...) never changes, so it is
+never fetched twice, while random words are never cached. Entries are
+stored in memcache in production and in a local SQLite file elsewhere."""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+try:
+    import sqlite3
+except ImportError:
+    # not available in the App Engine sandbox
+    sqlite3 = None
+
+# (resource path pattern, seconds to keep the response, 0 means forever).
+# Endpoints not listed here (random words) are never cached.
+ENDPOINT_TTLS = [
+    (r'^/word\.json/[^/]+(/(definitions|hyphenation|frequency|scrabbleScore|'
+     r'pronunciations|etymologies|relatedWords))?$', 0),
+    # the file urls of the audio responses expire
+    (r'^/word\.json/[^/]+/audio$', 3600),
+    (r'^/word\.json/[^/]+/(examples|topExample|phrases)$', 7 * 24 * 3600),
+    (r'^/words\.json/(search/[^/]+|reverseDictionary)$', 24 * 3600),
+    (r'^/words\.json/wordOfTheDay$', 3600),
+]
+MAX_ENTRIES = 10000
+CACHE_PATH = os.path.join(os.path.dirname(__file__), 'wordnik_cache.db')
+
+
+class ResponseCache(object):
+    """Cache policy (time to live of each endpoint) on top of a store"""
+
+    def __init__(self, store, ttls=ENDPOINT_TTLS):
+        self.store = store
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, resource_path):
+        """Returns the seconds to keep resource_path, None if not cached"""
+        for pattern, ttl in self.ttls:
+            if pattern.match(resource_path):
+                return ttl
+        return None
+
+    def get(self, key):
+        """Returns the cached response body or None"""
+        try:
+            value = self.store.get(key)
+        except Exception:
+            # a failing cache must never fail the Wordnik call
+            logging.exception('Could not read cached Wordnik response %s',
+                              key)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        """Caches a response body for ttl seconds (0 means forever)"""
+        try:
+            self.store.set(key, value, ttl)
+        except Exception:
+            # a failing cache must never fail the Wordnik call
+            logging.exception('Could not cache Wordnik response %s', key)
+
+
+class SQLiteStore(object):
+    """Local file store, the least recently used entries are evicted when it
+    holds more than max_entries"""
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                         'key TEXT PRIMARY KEY, value TEXT, '
+                         'expires REAL, used REAL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_used '
+                         'ON responses (used)')
+        self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value, expires FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            if expires and expires < now:
+                self._db.execute('DELETE FROM responses WHERE key = ?',
+                                 (key,))
+                value = None
+            else:
+                self._db.execute('UPDATE responses SET used = ? '
+                                 'WHERE key = ?', (now, key))
+            self._db.commit()
+        return value
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        expires = now + ttl if ttl else None
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO responses '
+                             'VALUES (?, ?, ?, ?)', (key, value, expires, now))
+            self._db.execute(
+                'DELETE FROM responses WHERE key IN (SELECT key FROM '
+                'responses ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,))
+            self._db.commit()
+
+
+class MemcacheStore(object):
+    """App Engine memcache store, memcache evicts the least recently used
+    entries itself"""
+
+    NAMESPACE = 'wordnik'
+
+    def __init__(self):
+        from google.appengine.api import memcache
+        self._memcache = memcache
+
+    def get(self, key):
+        return self._memcache.get(self._key(key), namespace=self.NAMESPACE)
+
+    def set(self, key, value, ttl):
+        self._memcache.set(self._key(key), value, time=ttl,
+                           namespace=self.NAMESPACE)
+
+    def _key(self, key):
+        # memcache keys are limited to 250 bytes
+        return hashlib.sha1(key).hexdigest()
+
+
+def default_cache():
+    """Returns the response cache for the current environment: memcache on
+    App Engine, a local SQLite file otherwise"""
+    on_app_engine = os.environ.get('SERVER_SOFTWARE', '').startswith(
+        'Google App Engine/')
+    if on_app_engine or sqlite3 is None:
+        return ResponseCache(MemcacheStore())
+    return ResponseCache(SQLiteStore())
@@ -0,0 +1,226 @@
+"""wordnik_stub.py - Local stand-in for the Wordnik API to run and benchmark
+the game without network. In record mode it forwards every request to the
+real API and saves the responses (and how long they took) into a fixtures
+file. In replay mode it answers from the fixtures, with configurable latency
+and injected errors.
+
+Point WORDNIK_API_URL to the stub, e.g.:
+    python wordnik_stub.py record fixtures.json --upstream http://api.wordnik.com/v4
+    python wordnik_stub.py replay fixtures.json --latency normal:0.2,0.05 \\
+        --error-rate 0.02
+
+dev_appserver does not pass the shell environment to the app, set the url in
+the env_variables of app.yaml before running dev_appserver.py app.yaml:
+    env_variables:
+      WORDNIK_API_URL: 'http://localhost:8089/v4'
+"""
+
+import BaseHTTPServer
+import SocketServer
+import argparse
+import json
+import random
+import threading
+import time
+import urllib2
+import urlparse
+
+PORT = 8089
+PREFIX = '/v4'
+
+
+class Latency(object):
+    """Delay added to every replayed response. Specs:
+        replay: the time recorded for the response (default)
+        fixed:SECONDS
+        uniform:LOW,HIGH
+        normal:MEAN,STDDEV
+        lognormal:MU,SIGMA"""
+
+    def __init__(self, spec='replay'):
+        kind, _, args = spec.partition(':')
+        self.kind = kind
+        self.args = [float(arg) for arg in args.split(',') if arg]
+        if kind not in ('replay', 'fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError('Unknown latency ' + spec)
+
+    def sample(self, recorded):
+        if self.kind == 'replay':
+            return recorded
+        if self.kind == 'fixed':
+            return self.args[0]
+        if self.kind == 'uniform':
+            return random.uniform(*self.args)
+        if self.kind == 'normal':
+            return max(0, random.normalvariate(*self.args))
+        return random.lognormvariate(*self.args)
+
+
+class Fixtures(object):
+    """Recorded responses, indexed by path and query string"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as fixtures:
+                self.entries = json.load(fixtures)
+        except IOError:
+            self.entries = []
+
+    def find(self, path, query):
+        """Returns a recorded response for the request: one with the same
+        query if any, otherwise one for the same path. Random picks among
+        several recordings, so random word endpoints stay random."""
+        same_path = [entry for entry in self.entries if entry['path'] == path]
+        same_query = [entry for entry in same_path if entry['query'] == query]
+        candidates = same_query or same_path
+        return random.choice(candidates) if candidates else None
+
+    def add(self, entry):
+        """Adds a recording and saves the fixtures file"""
+        with self._lock:
+            self.entries.append(entry)
+            with open(self.path, 'w') as fixtures:
+                json.dump(self.entries, fixtures, indent=1)
+
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Replays (or records) a single request"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        stub = self.server.stub
+        parts = urlparse.urlsplit(self.path)
+        path = parts.path
+        if path.startswith(stub.prefix):
+            path = path[len(stub.prefix):]
+        if stub.upstream:
+            status, body = stub.record(path, parts.query, self.headers)
+        else:
+            status, body = stub.replay(path, parts.query)
+        if status is None:
+            # injected timeout, close without answering
+            self.close_connection = 1
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.stub.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(
+                self, format, *args)
+
+
+class ThreadingHTTPServer(SocketServer.ThreadingMixIn,
+                          BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class WordnikStub(object):
+    """Stub server.
+    Args:
+        fixtures: path of the fixtures file.
+        upstream: real API url, enables record mode.
+        latency: Latency spec of the replayed responses.
+        error_rate: fraction of requests answered with error_status.
+        timeout_rate: fraction of requests never answered (the connection
+            is held for hang seconds, then closed)."""
+
+    def __init__(self, fixtures, port=PORT, prefix=PREFIX, upstream=None,
+                 latency='replay', error_rate=0.0, error_status=503,
+                 timeout_rate=0.0, hang=30, verbose=False):
+        self.fixtures = Fixtures(fixtures)
+        self.prefix = prefix
+        self.upstream = upstream
+        self.latency = Latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.verbose = verbose
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+        self.server.stub = self
+
+    @property
+    def url(self):
+        """Base url to use as WORDNIK_API_URL"""
+        return 'http://127.0.0.1:{}{}'.format(self.server.server_port,
+                                              self.prefix)
+
+    def start(self):
+        """Serves in a background thread and returns the base url"""
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def replay(self, path, query):
+        """Returns (status, body) of a recorded response, None status for
+        an injected timeout"""
+        draw = random.random()
+        if draw < self.timeout_rate:
+            time.sleep(self.hang)
+            return None, None
+        if draw < self.timeout_rate + self.error_rate:
+            return self.error_status, json.dumps({'message': 'injected'})
+        entry = self.fixtures.find(path, query)
+        if entry is None:
+            return 404, json.dumps({'message': 'no fixture for ' + path})
+        time.sleep(self.latency.sample(entry.get('elapsed', 0)))
+        return entry['status'], entry['body'].encode('utf-8')
+
+    def record(self, path, query, headers):
+        """Forwards the request to the real API and records its response"""
+        url = self.upstream + path + ('?' + query if query else '')
+        request = urllib2.Request(url)
+        if headers.get('api_key'):
+            request.add_header('api_key', headers['api_key'])
+        start = time.time()
+        try:
+            response = urllib2.urlopen(request)
+            status, body = response.getcode(), response.read()
+        except urllib2.HTTPError as e:
+            status, body = e.code, e.read()
+        self.fixtures.add({'path': path, 'query': query, 'status': status,
+                           'body': body.decode('utf-8'),
+                           'elapsed': round(time.time() - start, 4)})
+        return status, body
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Local Wordnik API stub.')
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('fixtures', help='fixtures file (JSON)')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--prefix', default=PREFIX)
+    parser.add_argument('--upstream', default='http://api.wordnik.com/v4',
+                        help='real API url used in record mode')
+    parser.add_argument('--latency', default='replay', help=Latency.__doc__)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--hang', type=float, default=30)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    stub = WordnikStub(args.fixtures, port=args.port, prefix=args.prefix,
+                       upstream=args.upstream if args.mode == 'record'
+                       else None,
+                       latency=args.latency, error_rate=args.error_rate,
+                       error_status=args.error_status,
+                       timeout_rate=args.timeout_rate, hang=args.hang,
+                       verbose=args.verbose)
+    print '{} Wordnik stub on {}'.format(args.mode, stub.url)
+    stub.server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""wordpool.py - In-memory pool of pre-fetched target words, keyed by word
+length. Words are fetched in bulk and handed out one at a time so that
+creating a game does not have to wait on the Wordnik API."""
+
+import collections
+import logging
+import threading
+import time
+
+# The pool of each length is sized from its observed demand (games per
+# second): a refill stores POOL_SECONDS of demand and a refill starts when
+# less than LOW_WATER_SECONDS of demand is left, within the bounds below.
+MIN_POOL_SIZE = 5
+MAX_POOL_SIZE = 200
+MIN_LOW_WATER_MARK = 2
+POOL_SECONDS = 300
+LOW_WATER_SECONDS = 30
+# demand is the highest rate of the short and the long window, peaks are
+# followed quickly and quiet periods shrink the pools slowly
+SHORT_WINDOW = 60
+LONG_WINDOW = 600
+BUCKET_SECONDS = 10
+MAX_REFILLS = 3
+
+
+class EmptyPoolError(Exception):
+    """No word could be fetched for the requested length"""
+
+
+class DemandTracker(object):
+    """Thread-safe count of events per key over a sliding window, kept in
+    buckets of bucket_seconds"""
+
+    def __init__(self, window=LONG_WINDOW, bucket_seconds=BUCKET_SECONDS,
+                 clock=time.time):
+        self.window = window
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self._buckets = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        """Counts an event for key"""
+        bucket = int(self.clock() // self.bucket_seconds)
+        with self._lock:
+            buckets = self._buckets[key]
+            if buckets and buckets[-1][0] == bucket:
+                buckets[-1][1] += 1
+            else:
+                buckets.append([bucket, 1])
+            self._expire(buckets, bucket)
+
+    def rate(self, key, seconds=None):
+        """Returns the events per second of key over the last seconds (the
+        whole window by default)"""
+        seconds = min(seconds or self.window, self.window)
+        first = int((self.clock() - seconds) // self.bucket_seconds) + 1
+        with self._lock:
+            count = sum(n for bucket, n in self._buckets.get(key, ())
+                        if bucket >= first)
+        return float(count) / seconds
+
+    def _expire(self, buckets, bucket):
+        oldest = bucket - int(self.window // self.bucket_seconds)
+        while buckets and buckets[0][0] <= oldest:
+            buckets.popleft()
+
+
+class WordPool(object):
+    """Thread-safe pool of words keyed by length, each length is sized from
+    its observed demand.
+    Args:
+        fetch: callable (length, limit) returning a list of valid words of
+            that length.
+        min_size, max_size: bounds of the words kept for a length after a
+            refill.
+        max_refills: maximum number of synchronous refills (external calls)
+            made by a single pop before giving up.
+        on_low_water: callable (length) called when a pop leaves the pool
+            under its low water mark, e.g. to enqueue a task refilling the
+            source of fetch. No thread is started: the App Engine runtime
+            would make the request wait for it."""
+
+    def __init__(self, fetch, min_size=MIN_POOL_SIZE, max_size=MAX_POOL_SIZE,
+                 max_refills=MAX_REFILLS, on_low_water=None, clock=time.time):
+        self.fetch = fetch
+        self.on_low_water = on_low_water
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_refills = max_refills
+        self.demand = DemandTracker(clock=clock)
+        self._words = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+
+    def level(self, length):
+        """Returns the number of words available for the given length"""
+        return len(self._words[length])
+
+    def demand_rate(self, length):
+        """Returns the games per second created for the given length"""
+        return max(self.demand.rate(length, SHORT_WINDOW),
+                   self.demand.rate(length, LONG_WINDOW))
+
+    def size(self, length):
+        """Returns the number of words to keep for the given length"""
+        size = int(round(self.demand_rate(length) * POOL_SECONDS))
+        return max(self.min_size, min(self.max_size, size))
+
+    def low_water_mark(self, length):
+        """Returns the level under which the given length is refilled"""
+        mark = int(round(self.demand_rate(length) * LOW_WATER_SECONDS))
+        return max(MIN_LOW_WATER_MARK, min(self.size(length) // 2, mark))
+
+    def metrics(self):
+        """Returns the demand rate (games per minute), level, size and low
+        water mark of every length seen so far"""
+        with self._lock:
+            lengths = list(self._words)
+        return dict((length, {
+            'games_per_minute': round(self.demand_rate(length) * 60, 2),
+            'level': self.level(length),
+            'size': self.size(length),
+            'low_water_mark': self.low_water_mark(length),
+        }) for length in lengths)
+
+    def pop(self, length):
+        """Returns a word of the given length. Only when the pool is empty
+        the caller waits for a refill, otherwise the word is served in O(1)
+        and on_low_water is called if the pool is running low.
+        Raises:
+            EmptyPoolError: if the pool is still empty after max_refills."""
+        self.demand.add(length)
+        word = self._pop(length)
+        refills = 0
+        while word is None:
+            if refills == self.max_refills:
+                raise EmptyPoolError(
+                    'No words of length {} available'.format(length))
+            self.refill(length)
+            refills += 1
+            word = self._pop(length)
+        if self.on_low_water and \
+                self.level(length) < self.low_water_mark(length):
+            try:
+                self.on_low_water(length)
+            except Exception:
+                # the word is served anyway, the next pops will call again
+                logging.exception('Low water callback failed for length %d',
+                                  length)
+        return word
+
+    def refill(self, length):
+        """Fetches words of the given length until the pool is full, the
+        batch size follows the demand of the length"""
+        missing = self.size(length) - self.level(length)
+        if missing <= 0:
+            return
+        words = self.fetch(length, missing)
+        with self._lock:
+            self._words[length].extend(words)
+
+    def _pop(self, length):
+        """Pops a word from the pool or returns None if it is empty"""
+        with self._lock:
+            words = self._words[length]
+            if words:
+                return words.popleft()
+        return None